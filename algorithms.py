@@ -0,0 +1,195 @@
+import math
+import time
+import multiprocessing
+from search import do_search
+from state import State, get_moves
+from heuristics import *
+from ida_star import do_ida_search
+from bidirectional import do_bidirectional_search
+from anytime import do_anytime_search
+from external_bfs import do_external_search
+from distance_table import do_table_search, MAX_TABLE_SIZE
+from hda_star import do_hda_search
+# the batch search needs numpy, it is only registered when numpy is installed
+try:
+    from vectorized import do_batch_search
+except ImportError:
+    do_batch_search = None
+from pattern_db import PatternDatabaseHeuristic, build_pattern_dbs, PARTITIONS, DEFAULT_PARTITIONS
+from puzzle_spec import get_default_spec
+
+# algorithms that can be run by name (worker processes only get the name)
+#   name is the name of the algorithm in the plots
+#   heuristic is a name in HEURISTICS (or None for no heuristic)
+#   optimal is True for the algorithms that always find an optimal solution
+#   options are extra keyword arguments of the search function (e.g. the weight of weighted A*)
+ALGORITHMS = {
+    'ucs' : {'name' : "UCS/BFS", 'search' : do_search, 'heuristic' : None, 'heuristic_only' : False, 'optimal' : True},
+    'greedy_mt' : {'name' : "Greedy Best First Search - Misplaced Tiles Heuristic", 'search' : do_search, 'heuristic' : 'misplaced_tiles', 'heuristic_only' : True, 'optimal' : False},
+    'greedy_md' : {'name' : "Greedy Best First Search - Manhattan Distance Heuristic", 'search' : do_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : True, 'optimal' : False},
+    'a_star_mt' : {'name' : "A* - Misplaced Tiles Heuristic", 'search' : do_search, 'heuristic' : 'misplaced_tiles', 'heuristic_only' : False, 'optimal' : True},
+    'a_star_md' : {'name' : "A* - Manhattan Distance Heuristic", 'search' : do_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : True},
+    'a_star_lc' : {'name' : "A* - Linear Conflict Heuristic", 'search' : do_search, 'heuristic' : 'linear_conflict', 'heuristic_only' : False, 'optimal' : True},
+    'a_star_wd' : {'name' : "A* - Walking Distance Heuristic", 'search' : do_search, 'heuristic' : 'walking_distance', 'heuristic_only' : False, 'optimal' : True},
+    'wa_star_md' : {'name' : "Weighted A* (w = 2) - Manhattan Distance Heuristic", 'search' : do_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : False, 'options' : {'weight' : 2}},
+    'awa_star_md' : {'name' : "Anytime Weighted A* (w = 3) - Manhattan Distance Heuristic", 'search' : do_anytime_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : True, 'options' : {'weight' : 3}},
+    'ida_star_md' : {'name' : "IDA* - Manhattan Distance Heuristic", 'search' : do_ida_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : True},
+    'bidirectional_ucs' : {'name' : "Bidirectional UCS (MM0)", 'search' : do_bidirectional_search, 'heuristic' : None, 'heuristic_only' : False, 'optimal' : True},
+    'mm_md' : {'name' : "Bidirectional MM - Manhattan Distance Heuristic", 'search' : do_bidirectional_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : True},
+    'external_bfs' : {'name' : "BFS - Disk Layers with Delayed Duplicate Detection", 'search' : do_external_search, 'heuristic' : None, 'heuristic_only' : False, 'optimal' : True},
+    'hda_star_md' : {'name' : "HDA* (all cores) - Manhattan Distance Heuristic", 'search' : do_hda_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : True},
+    'distance_table' : {'name' : "Exact Distance Table Lookup", 'search' : do_table_search, 'heuristic' : None, 'heuristic_only' : False, 'optimal' : True},
+    'a_star_pdb' : {'name' : "A* - Additive Pattern Database Heuristic", 'search' : do_search, 'heuristic' : 'pattern_db', 'heuristic_only' : False, 'optimal' : True},
+}
+
+if do_batch_search:
+    ALGORITHMS['batch_a_star_md'] = {'name' : "Batch A* (64 nodes) - Manhattan Distance Heuristic", 'search' : do_batch_search, 'heuristic' : 'manhattan_distance', 'heuristic_only' : False, 'optimal' : False}
+
+# options of the search functions that a remote client can set (see server.py), the
+#   others (directories, number of processes ...) are only set by the caller of solve
+#   every value is a finite positive number (time_limit can be 0), batch_size an int
+CLIENT_OPTIONS = {
+    do_search : ['weight'],
+    do_anytime_search : ['weight', 'time_limit'],
+}
+if do_batch_search:
+    CLIENT_OPTIONS[do_batch_search] = ['weight', 'batch_size']
+
+# returns the error message of options sent by a client for an algorithm, None if they are valid
+def check_client_options(algorithm, options):
+    if options is None:
+        return None
+    if not isinstance(options, dict):
+        return 'options must be an object'
+    allowed = CLIENT_OPTIONS.get(ALGORITHMS[algorithm]['search'], [])
+    for name, value in options.items():
+        if not name in allowed:
+            return 'option %s is not allowed for %s (allowed: %s)' % (name, algorithm, ', '.join(allowed) or 'none')
+        # json.loads accepts NaN and Infinity
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0 or (value == 0 and name != 'time_limit'):
+            return 'option %s must be a positive number' % name
+        if name == 'batch_size' and not isinstance(value, int):
+            return 'option batch_size must be an int'
+    return None
+
+HEURISTICS = {
+    'misplaced_tiles' : h_misplaced_tiles,
+    'manhattan_distance' : h_manhattan_distance,
+    'linear_conflict' : h_linear_conflict,
+    'walking_distance' : h_walking_distance,
+}
+
+# heuristics that need tables for a spec, created once per process
+_heuristic_cache = {}
+
+# returns the heuristic function for a name, spec is the PuzzleSpec it is used with
+#   (default: the spec of the goal in puzzle_globals.py)
+def get_heuristic(name, spec = None):
+    if name is None:
+        return None
+    if name in HEURISTICS:
+        return HEURISTICS[name]
+
+    spec = spec or get_default_spec()
+    cache_key = (name, spec.rows, spec.cols, tuple(spec.goal))
+    if not cache_key in _heuristic_cache:
+        if name == 'pattern_db':
+            partition = PARTITIONS[DEFAULT_PARTITIONS[spec.size]]
+            # only the main process builds missing databases, workers of a pool would all
+            #   build the same ones at once (see prepare_tables)
+            _heuristic_cache[cache_key] = PatternDatabaseHeuristic(partition, spec, build = multiprocessing.parent_process() is None)
+        else:
+            raise ValueError('unknown heuristic %s' % name)
+    return _heuristic_cache[cache_key]
+
+# builds the pattern databases the algorithms need for spec, in this process
+#   called before the worker processes are started (batch.py, server.py)
+def prepare_tables(algorithms, spec = None):
+    spec = spec or get_default_spec()
+    for algorithm in algorithms:
+        if ALGORITHMS[algorithm]['heuristic'] == 'pattern_db' and spec.size in DEFAULT_PARTITIONS:
+            build_pattern_dbs(PARTITIONS[DEFAULT_PARTITIONS[spec.size]], spec)
+
+# names of the algorithms compared by main for a spec
+#   (external_bfs explores the same layers as ucs, it is only worth it for searches that dont fit in memory,
+#   hda_star_md starts a process per core for every sample, see get_scaling in hda_star.py instead)
+def get_algorithm_names(spec = None):
+    spec = spec or get_default_spec()
+    res = ['ucs', 'greedy_mt', 'greedy_md', 'a_star_mt', 'a_star_md', 'a_star_lc', 'a_star_wd', 'wa_star_md', 'awa_star_md', 'ida_star_md', 'bidirectional_ucs', 'mm_md']
+    if 'batch_a_star_md' in ALGORITHMS:
+        res.append('batch_a_star_md')
+    # the pattern database heuristic is only used for board sizes with a default partition
+    if spec.size in DEFAULT_PARTITIONS:
+        res.append('a_star_pdb')
+    # the exact distance table is only built for small boards
+    if spec.size <= MAX_TABLE_SIZE:
+        res.append('distance_table')
+    return res
+
+# solves one instance with an algorithm (by name)
+#   spec is the PuzzleSpec of the instance (default: the spec of the goal in puzzle_globals.py)
+#   cache is an optional SolutionCache (see solution_cache.py), a cached result is
+#     returned without searching and new results are added to it
+#   with exact_heuristic = True the optimal costs already in the cache are used as
+#     perfect heuristic values (by every algorithm with a heuristic but the batch search)
+#   stats is an optional SearchStats (see instrumentation.py), only the algorithms
+#     that search with do_search are instrumented
+#   options override the options of the algorithm, e.g. {'weight' : 1.5} or
+#     {'time_limit' : 0.1} for the anytime search, results with options are not cached
+# returns a dictionary {cost : int, moves : str, max_frontier_size : int, states_evaluated : int, time : seconds}
+#   and stats : {counters, timers, elapsed} for instrumented searches
+#   and improvements : [{cost, time, states_evaluated}] for anytime searches
+#   or {timed_out : True, max_frontier_size, states_evaluated, time} when an anytime search
+#     found no solution within its time_limit
+def solve(instance, algorithm, spec = None, cache = None, exact_heuristic = False, stats = None, options = None):
+    spec = spec or get_default_spec()
+    entry = ALGORITHMS[algorithm]
+    if options:
+        cache = None
+    options = dict(entry.get('options', {}), **(options or {}))
+    heuristic_function = get_heuristic(entry['heuristic'], spec)
+    init_state = State(list(instance), 0, None, heuristic_function, entry['heuristic_only'], spec = spec)
+
+    exact = None
+    if cache:
+        res = cache.get(spec, init_state.key, algorithm)
+        if res:
+            return res
+        # the batch search only takes the heuristics it has a numpy version of (see vectorized.py)
+        if exact_heuristic and heuristic_function and entry['search'] is not do_batch_search:
+            exact = cache.heuristic(heuristic_function, spec)
+            init_state = State(list(instance), 0, None, exact, entry['heuristic_only'], spec = spec)
+
+    start = time.perf_counter()
+    if stats is not None and entry['search'] is do_search:
+        sol = do_search(init_state, stats = stats, **options)
+    else:
+        sol = entry['search'](init_state, **options)
+    elapsed = time.perf_counter() - start
+    # the exact costs used by the search are the most recently used ones of the cache
+    if exact:
+        cache.touch_distances(spec, exact.used)
+
+    # an anytime search stopped by its time limit before its first solution
+    if not sol['solutions']:
+        return {
+            'timed_out' : True,
+            'max_frontier_size' : sol['max_frontier_size'],
+            'states_evaluated' : sol['states_evaluated'],
+            'time' : elapsed,
+        }
+
+    res = {
+        'cost' : sol['solutions'][-1].cost,
+        'moves' : get_moves(sol['path']) if 'path' in sol else None,
+        'max_frontier_size' : sol['max_frontier_size'],
+        'states_evaluated' : sol['states_evaluated'],
+        'time' : elapsed,
+    }
+    if 'stats' in sol:
+        res['stats'] = sol['stats']
+    if 'improvements' in sol:
+        res['improvements'] = sol['improvements']
+    if cache:
+        cache.put(spec, init_state.key, algorithm, res, sol.get('path'), entry['optimal'] and sol.get('optimal', True))
+    return res
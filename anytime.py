@@ -0,0 +1,96 @@
+import time
+from state import *
+from open_list import OpenList
+from search import get_priority, get_solution_path, closed_entry, closed_cost
+
+# anytime weighted A* (AWA*, Hansen and Zhou 2007)
+#
+# a weighted A* search (f = g + weight * h) finds a first solution quickly, then
+#   the same search keeps going with the same open list and closed table to find
+#   better ones, every improvement is added to res['solutions'] (so the last one is
+#   the best) and reported with the time it was found
+# the cost of the best solution found so far (the incumbent) prunes the search:
+#   states with g + h >= incumbent cant lead to a better solution and are dropped
+#   (h must be admissible), when the open list is empty the incumbent is optimal
+# with a time_limit the search stops after that many seconds and returns the best
+#   solution found, res['optimal'] is only True when the search ran to the end
+#   when the time runs out before the first solution res['solutions'] is empty and
+#   res['timed_out'] is True
+#
+# on_solution is called with the dictionary of every improvement
+#   {cost : int, time : seconds since the start, states_evaluated : int}
+
+# returns the same dictionary as do_search in search.py, with
+#   improvements : [{cost, time, states_evaluated}] in the order they were found
+#   optimal : True if the last solution was proven optimal
+#   timed_out : True if the time limit ran out before any solution was found
+def do_anytime_search(init_state, weight = 3, time_limit = None, on_solution = None):
+    res = {
+        'solutions' : [],
+        'improvements' : [],
+        'optimal' : False,
+        'timed_out' : False,
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+    }
+    start = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else None
+
+    frontier = OpenList()
+    # closed table of do_search (see closed_entry in search.py)
+    stride = init_state.size + 1
+    bits = init_state.spec.bits
+    duplicates = {init_state.key:closed_entry(init_state.cost, None, stride)}
+    incumbent = float('inf')
+
+    # a new solution is kept as soon as it is generated, its path is rebuilt right away
+    #   since cheaper paths found later can change the parents in the closed table
+    def improve(goal_state):
+        res['path'] = get_solution_path(init_state, goal_state, duplicates)
+        res['solutions'].append(goal_state)
+        improvement = {'cost' : goal_state.cost, 'time' : time.perf_counter() - start, 'states_evaluated' : res['states_evaluated']}
+        res['improvements'].append(improvement)
+        if on_solution:
+            on_solution(improvement)
+        return goal_state.cost
+
+    if init_state.is_goal():
+        incumbent = improve(init_state)
+    else:
+        frontier.push(init_state, get_priority(init_state, weight))
+
+    while len(frontier) > 0:
+        if deadline is not None and time.perf_counter() > deadline:
+            res['timed_out'] = len(res['solutions']) == 0
+            return res
+
+        f, curr_state = frontier.pop()
+        if curr_state.cost + curr_state.heuristic >= incumbent:
+            continue
+        res['states_evaluated'] += 1
+
+        # children are made from the (move, delta) pairs only once they pass both tests
+        cost = curr_state.cost + 1
+        for tile_index, delta in curr_state.successors():
+            child_key = move(curr_state.key, curr_state.blank, tile_index, bits)
+            if child_key in duplicates and cost >= closed_cost(duplicates[child_key], stride):
+                continue
+            if delta is None:
+                child = curr_state.child(tile_index)
+                child_h = child.heuristic
+            else:
+                child = None
+                child_h = curr_state.heuristic + delta
+            if cost + child_h >= incumbent:
+                continue
+            duplicates[child_key] = closed_entry(cost, curr_state.blank, stride)
+            child = child or curr_state.child(tile_index, delta)
+            if child.is_goal():
+                incumbent = improve(child)
+            else:
+                frontier.push(child, get_priority(child, weight))
+
+        res['max_frontier_size'] = max(res['max_frontier_size'], len(frontier))
+
+    res['optimal'] = len(res['solutions']) > 0
+    return res
@@ -0,0 +1,23 @@
+import os
+from contextlib import contextmanager
+
+# opens a file to be written in place of path (its directory is created if missing)
+#   the data goes to a temp file that replaces path once the block is done, so other
+#   processes never read or map a half written file, and a block that raises leaves
+#   path as it was
+#   the temp file is per process, several processes can write the same file at once
+#   (the last one to finish wins)
+#   with atomic_open(path) as f:
+#       f.write(data)
+@contextmanager
+def atomic_open(path, mode = 'wb'):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+    temp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with open(temp_path, mode) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,119 @@
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from algorithms import ALGORITHMS, solve, prepare_tables
+from search import do_search
+from solution_cache import SolutionCache
+from instrumentation import SearchStats, SearchCancelled
+from puzzle_spec import get_default_spec
+
+# batch solver that sends (instance, algorithm name) jobs to a pool of worker processes
+#
+# jobs are sent in chunks so a worker solves several small instances per round trip,
+#   the results are returned in the same order as the jobs
+# a job that runs for more than timeout seconds is stopped and its result is
+#   {timed_out : True} (the timeout needs signal.setitimer, so it is ignored on windows)
+# a job that evaluates more than max_nodes states is stopped and its result is
+#   {node_limit : True}, the budget is checked by the progress callback of an
+#   instrumented search, so it is only supported by the algorithms that search with
+#   do_search, a max_nodes for any other algorithm raises ValueError
+
+# solution cache of this process for each cache file, sqlite connections cant be
+#   sent to the workers so every process opens its own
+_caches = {}
+
+def get_cache(cache_path):
+    if not cache_path:
+        return None
+    if not cache_path in _caches:
+        _caches[cache_path] = SolutionCache(cache_path)
+    return _caches[cache_path]
+
+class SolveTimeout(Exception):
+    pass
+
+def raise_timeout(signum, frame):
+    raise SolveTimeout()
+
+class NodeLimitExceeded(SearchCancelled):
+    pass
+
+def raise_node_limit(progress):
+    raise NodeLimitExceeded()
+
+# solves a single job, stopping it after timeout seconds
+#   with instrument = True the result has the stats of the search (see instrumentation.py)
+#   options and exact_heuristic are passed to solve in algorithms.py (exact_heuristic
+#   uses the optimal costs in the cache of cache_path as heuristic values)
+def solve_job(instance, algorithm, spec = None, timeout = None, cache_path = None, instrument = False, max_nodes = None, options = None,
+              exact_heuristic = False):
+    if max_nodes and ALGORITHMS[algorithm]['search'] is not do_search:
+        raise ValueError('max_nodes is not supported by %s (only by the algorithms that search with do_search)' % algorithm)
+    stats = None
+    if instrument or max_nodes:
+        stats = SearchStats(timers = instrument, progress = raise_node_limit if max_nodes else None, progress_interval = max_nodes)
+    use_timer = timeout and hasattr(signal, 'setitimer')
+    if use_timer:
+        old_handler = signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return solve(instance, algorithm, spec, get_cache(cache_path), exact_heuristic, stats = stats, options = options)
+    except SolveTimeout:
+        return {'timed_out' : True}
+    except NodeLimitExceeded:
+        return {'node_limit' : True}
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, old_handler)
+
+# runs in the worker processes
+def solve_chunk(jobs, spec, timeout, cache_path, instrument, exact_heuristic):
+    return [solve_job(instance, algorithm, spec, timeout, cache_path, instrument, exact_heuristic = exact_heuristic) for instance, algorithm in jobs]
+
+# solves a list of (instance, algorithm name) jobs
+#   workers is the number of worker processes (default: number of cores), 1 solves
+#     everything in this process
+#   chunksize is the number of jobs sent to a worker at once
+#   timeout is the maximum number of seconds for a single job
+#   spec is the PuzzleSpec of the instances (default: the spec of the goal in puzzle_globals.py)
+#   cache_path is an optional solution cache file (see solution_cache.py), instances
+#     already in it are not searched again
+#   instrument = True adds the counters and phase timers of the searches to the results
+#   exact_heuristic = True uses the optimal costs in the cache as heuristic values
+# returns the list of results of solve in algorithms.py, in the order of jobs
+def solve_batch(jobs, workers = None, chunksize = None, timeout = None, progress = True, desc = 'Solving', spec = None, cache_path = None, instrument = False,
+                exact_heuristic = False):
+    jobs = list(jobs)
+    spec = spec or get_default_spec()
+    results = [None] * len(jobs)
+    workers = workers or os.cpu_count() or 1
+    if not chunksize:
+        chunksize = max(1, len(jobs) // (workers * 4))
+
+    # imported here so the worker processes never load it
+    from tqdm import tqdm
+    progress_bar = tqdm(total = len(jobs), desc = desc, disable = not progress)
+    if workers == 1:
+        for index in range(len(jobs)):
+            instance, algorithm = jobs[index]
+            results[index] = solve_job(instance, algorithm, spec, timeout, cache_path, instrument, exact_heuristic = exact_heuristic)
+            progress_bar.update(1)
+    else:
+        # the workers dont build missing tables themselves
+        prepare_tables(sorted(set(algorithm for instance, algorithm in jobs)), spec)
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = {}
+            for start in range(0, len(jobs), chunksize):
+                future = executor.submit(solve_chunk, jobs[start : start + chunksize], spec, timeout, cache_path, instrument, exact_heuristic)
+                futures[future] = start
+
+            # the progress bar is updated as soon as any worker finishes a chunk
+            for future in as_completed(futures):
+                start = futures[future]
+                chunk_results = future.result()
+                results[start : start + len(chunk_results)] = chunk_results
+                progress_bar.update(len(chunk_results))
+    progress_bar.close()
+
+    return results
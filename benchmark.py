@@ -0,0 +1,285 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from algorithms import ALGORITHMS, get_algorithm_names
+from batch import solve_job
+from instrumentation import COUNTERS, PHASES, merge_stats
+from instances import puzzle_at_depth
+from puzzle_spec import PuzzleSpec
+
+# headless benchmark of the search algorithms on fixed, seeded instance sets
+#
+#   py benchmark.py [--sets 8puzzle-depth ...] [--algorithms a_star_md ...] [--out results.json]
+#                   [--baseline baseline.json] [--tolerance 0.1] [--no-memory] [--stats]
+#                   [--instances file --rows 4 --cols 4 [--blank-first]] [--store directory]
+#   py benchmark.py --imports
+#
+# every (instance set, algorithm) pair is run on all the instances of the set and gets
+#   one result row with the number of instances solved, the total states evaluated and
+#   wall time, nodes/sec, the largest frontier and the peak memory of a single solve
+#   (measured with tracemalloc in a second run, so the timings are not slowed down)
+#   with --stats the searches are also run instrumented (see instrumentation.py) and the
+#   rows get the total search counters and the seconds spent in each phase (time_<phase>)
+#   a row also has the cost, states evaluated and frontier of every instance (None for the
+#   ones that timed out) in per_instance, which is only written to json
+# the rows are written to json or csv (from the extension of --out), and compared to a
+#   baseline file written by an earlier run, slower or bigger searches are reported as
+#   regressions and the exit code is 1
+# --store also appends the result of every single solve to a results store (see
+#   results_store.py), so the runs of many days can be analysed together
+# --imports times the import of every solver module in a new interpreter instead, and
+#   fails if one of them loads a plotting module (the solver core must stay import light)
+
+# instance sets, each instance set has per_depth instances at each optimal depth,
+#   generated with a fixed seed so every run uses the same instances
+INSTANCE_SETS = {
+    '8puzzle-depth' : {'rows' : 3, 'cols' : 3, 'depths' : [4, 8, 12, 16, 20, 24], 'per_depth' : 5, 'seed' : 8},
+    '15puzzle-depth' : {'rows' : 4, 'cols' : 4, 'depths' : [10, 20, 30, 40], 'per_depth' : 5, 'seed' : 15,
+                        'algorithms' : ['a_star_md', 'a_star_lc', 'a_star_wd', 'ida_star_md', 'mm_md']},
+}
+
+# columns of a result row
+COLUMNS = ['set', 'algorithm', 'instances', 'solved', 'timeouts', 'total_cost', 'states_evaluated',
+           'wall_time', 'nodes_per_sec', 'max_frontier_size', 'peak_memory']
+
+# columns of every solved instance in row['per_instance']
+PER_INSTANCE_COLUMNS = ['cost', 'states_evaluated', 'max_frontier_size']
+
+# extra columns with --stats
+STATS_COLUMNS = COUNTERS + ['time_' + phase for phase in PHASES]
+
+# modules used by solver processes, and the modules they must not load
+CORE_MODULES = ['search', 'algorithms', 'batch', 'stream', 'server', 'hda_star']
+PLOTTING_MODULES = ['plotly', 'tqdm']
+
+# imports module in a new interpreter, returns (seconds, plotting modules loaded by the import)
+def measure_import(module):
+    code = ('import sys, time\nstart = time.perf_counter()\nimport %s\nprint(time.perf_counter() - start)\n'
+            'print(" ".join(name for name in %r if name in sys.modules))' % (module, PLOTTING_MODULES))
+    out = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, check = True,
+                         cwd = os.path.dirname(os.path.abspath(__file__))).stdout.split('\n')
+    return float(out[0]), out[1].split()
+
+# prints the import time of the core modules, returns the list of modules that load plotting modules
+def check_imports():
+    res = []
+    for module in CORE_MODULES:
+        seconds, loaded = measure_import(module)
+        print('import %-12s %7.3fs%s' % (module, seconds, '  loads ' + ', '.join(loaded) if loaded else ''))
+        if loaded:
+            res.append(module)
+    return res
+
+# returns (spec, list of instances) of an instance set
+def get_instance_set(name):
+    instance_set = INSTANCE_SETS[name]
+    spec = PuzzleSpec(instance_set['rows'], instance_set['cols'])
+    rng = random.Random(instance_set['seed'])
+    instances = []
+    for depth in instance_set['depths']:
+        for i in range(instance_set['per_depth']):
+            instance = puzzle_at_depth(spec, depth, rng)
+            if instance:
+                instances.append(instance)
+    return spec, instances
+
+# reads instances from a file, one instance per line (tiles separated by spaces or commas)
+#   lines starting with # are skipped, so standard sets like Korf's 100 15-puzzle
+#   instances can be used (with blank_first for goals with the blank in the top left)
+def read_instances(path, rows, cols, blank_first = False):
+    goal = list(range(rows * cols)) if blank_first else None
+    spec = PuzzleSpec(rows, cols, goal)
+    instances = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'): continue
+            instances.append([int(tile) for tile in line.replace(',', ' ').split()])
+    return spec, instances
+
+# peak memory allocated while solving an instance, in bytes
+def measure_memory(instance, algorithm, spec, timeout):
+    tracemalloc.start()
+    try:
+        solve_job(instance, algorithm, spec, timeout)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+# runs an algorithm on all the instances of a set, returns a result row
+#   store is an optional ResultStore the result of every instance is appended to
+def run(set_name, spec, instances, algorithm, timeout = None, memory = True, instrument = False, store = None):
+    row = dict.fromkeys(COLUMNS, 0)
+    row['set'] = set_name
+    row['algorithm'] = algorithm
+    row['instances'] = len(instances)
+    row['per_instance'] = []
+
+    stats = []
+    results = []
+    for instance in instances:
+        result = solve_job(instance, algorithm, spec, timeout)
+        results.append(result)
+        if result.get('timed_out'):
+            row['timeouts'] += 1
+            row['per_instance'].append(None)
+            continue
+        row['per_instance'].append({column : result[column] for column in PER_INSTANCE_COLUMNS})
+        row['solved'] += 1
+        row['total_cost'] += result['cost']
+        row['states_evaluated'] += result['states_evaluated']
+        row['wall_time'] += result['time']
+        row['max_frontier_size'] = max(row['max_frontier_size'], result['max_frontier_size'])
+        if memory:
+            row['peak_memory'] = max(row['peak_memory'], measure_memory(instance, algorithm, spec, timeout))
+        if instrument:
+            stats.append(solve_job(instance, algorithm, spec, timeout, instrument = True).get('stats'))
+
+    if store is not None:
+        store.append(spec, [(instance, algorithm) for instance in instances], results)
+    row['nodes_per_sec'] = row['states_evaluated'] / row['wall_time'] if row['wall_time'] else 0
+    if instrument:
+        # algorithms that dont search with do_search have no stats
+        stats = merge_stats([s for s in stats if s])
+        row.update(stats['counters'])
+        for phase in PHASES:
+            row['time_' + phase] = stats['timers'][phase]
+    return row
+
+def write_results(path, rows):
+    if path.endswith('.csv'):
+        with open(path, 'w', newline = '') as f:
+            fieldnames = COLUMNS + STATS_COLUMNS if rows and 'expanded' in rows[0] else COLUMNS
+            writer = csv.DictWriter(f, fieldnames = fieldnames, extrasaction = 'ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w') as f:
+            json.dump({
+                'python' : platform.python_version(),
+                'platform' : platform.platform(),
+                'date' : time.strftime('%Y-%m-%d %H:%M:%S'),
+                'results' : rows,
+            }, f, indent = 2)
+
+def read_results(path):
+    if path.endswith('.csv'):
+        with open(path, newline = '') as f:
+            return [{column : (value if column in ('set', 'algorithm') else float(value)) for column, value in row.items()}
+                    for row in csv.DictReader(f)]
+    with open(path) as f:
+        return json.load(f)['results']
+
+# (values of row, values of base) for the searches that are compared, only over the
+#   instances solved in both runs, so solving more (harder) instances than the baseline
+#   isnt reported as a regression
+#   rows without per_instance (csv files) are compared on the means per solved instance
+def get_compared_values(row, base):
+    instances, base_instances = row.get('per_instance'), base.get('per_instance')
+    if instances is not None and base_instances is not None and len(instances) == len(base_instances):
+        both = [(result, base_result) for result, base_result in zip(instances, base_instances) if result and base_result]
+        values = []
+        for results in ([pair[0] for pair in both], [pair[1] for pair in both]):
+            values.append({
+                'total_cost' : sum(result['cost'] for result in results),
+                'states_evaluated' : sum(result['states_evaluated'] for result in results),
+                'max_frontier_size' : max([result['max_frontier_size'] for result in results], default = 0),
+            })
+        return values[0], values[1]
+
+    values = []
+    for r in (row, base):
+        solved = r['solved'] or 1
+        values.append({
+            'total_cost' : r['total_cost'] / solved,
+            'states_evaluated' : r['states_evaluated'] / solved,
+            'max_frontier_size' : r['max_frontier_size'],
+        })
+    return values[0], values[1]
+
+# compares result rows to baseline rows of the same (set, algorithm)
+# returns the list of regressions as strings
+#   nodes/sec more than tolerance below the baseline, more timeouts than the baseline,
+#   or more states evaluated, a bigger frontier or a worse total cost on the instances
+#   solved in both runs (see get_compared_values)
+def compare(rows, baseline_rows, tolerance = 0.1):
+    baseline = {(row['set'], row['algorithm']) : row for row in baseline_rows}
+    res = []
+    for row in rows:
+        base = baseline.get((row['set'], row['algorithm']))
+        if not base: continue
+        name = '%s %s' % (row['set'], row['algorithm'])
+        if row['nodes_per_sec'] < base['nodes_per_sec'] * (1 - tolerance):
+            res.append('%s: %.0f nodes/sec, baseline %.0f' % (name, row['nodes_per_sec'], base['nodes_per_sec']))
+        if row['timeouts'] > base['timeouts']:
+            res.append('%s: timeouts %d, baseline %d' % (name, row['timeouts'], base['timeouts']))
+        values, base_values = get_compared_values(row, base)
+        for column in ('states_evaluated', 'max_frontier_size', 'total_cost'):
+            if values[column] > base_values[column]:
+                res.append('%s: %s %g, baseline %g' % (name, column, values[column], base_values[column]))
+    return res
+
+def main():
+    parser = argparse.ArgumentParser(description = 'benchmark of the n puzzle search algorithms')
+    parser.add_argument('--sets', nargs = '+', default = sorted(INSTANCE_SETS), choices = sorted(INSTANCE_SETS))
+    parser.add_argument('--algorithms', nargs = '+', choices = sorted(ALGORITHMS))
+    parser.add_argument('--instances', help = 'file with one instance per line, used instead of --sets')
+    parser.add_argument('--rows', type = int, default = 4)
+    parser.add_argument('--cols', type = int, default = 4)
+    parser.add_argument('--blank-first', action = 'store_true', help = 'the goal of --instances has the blank in the top left')
+    parser.add_argument('--timeout', type = float, help = 'seconds per instance')
+    parser.add_argument('--no-memory', action = 'store_true', help = 'skip the peak memory runs')
+    parser.add_argument('--stats', action = 'store_true', help = 'add the search counters and phase timers')
+    parser.add_argument('--out', default = 'benchmark.json')
+    parser.add_argument('--baseline', help = 'results of an earlier run to compare to')
+    parser.add_argument('--tolerance', type = float, default = 0.1)
+    parser.add_argument('--store', help = 'results store directory the single results are appended to')
+    parser.add_argument('--imports', action = 'store_true', help = 'check the import time of the solver modules')
+    args = parser.parse_args()
+
+    if args.imports:
+        if check_imports():
+            sys.exit(1)
+        return
+
+    instance_sets = []
+    if args.instances:
+        spec, instances = read_instances(args.instances, args.rows, args.cols, args.blank_first)
+        instance_sets.append((os.path.basename(args.instances), spec, instances, None))
+    else:
+        for name in args.sets:
+            spec, instances = get_instance_set(name)
+            instance_sets.append((name, spec, instances, INSTANCE_SETS[name].get('algorithms')))
+
+    store = None
+    if args.store:
+        # imported here since only --store needs it
+        from results_store import ResultStore
+        store = ResultStore(args.store)
+
+    rows = []
+    for set_name, spec, instances, set_algorithms in instance_sets:
+        for algorithm in args.algorithms or set_algorithms or get_algorithm_names(spec):
+            row = run(set_name, spec, instances, algorithm, args.timeout, not args.no_memory, args.stats, store)
+            rows.append(row)
+            print('%-16s %-18s %4d/%-4d solved %10d nodes %9.3fs %10.0f nodes/sec frontier %8d memory %10d' % (
+                set_name, algorithm, row['solved'], row['instances'], row['states_evaluated'], row['wall_time'],
+                row['nodes_per_sec'], row['max_frontier_size'], row['peak_memory']))
+    write_results(args.out, rows)
+
+    if args.baseline:
+        regressions = compare(rows, read_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import heapq
+from state import *
+from puzzle_spec import PuzzleSpec
+
+# bidirectional search meeting in the middle (MM, Holte et al. 2016)
+#
+# one search goes forward from the initial state to the goal of its spec,
+#   the other goes backward from the goal to the initial state
+#   each direction expands the node with the smallest priority
+#   pr(n) = max(g(n) + h(n), 2 * g(n))
+#   without a heuristic this is a bidirectional uniform cost search (MM0)
+#
+# the backward heuristic is the same heuristic function with a spec whose goal is the
+#   initial state, so it estimates the distance of a board to the initial state
+#
+# U is the cost of the best solution found so far (a node generated in one direction
+#   that was already seen by the other), the search stops when
+#   U <= max(C, fmin_forward, fmin_backward, gmin_forward + gmin_backward + 1)
+#   where C is the smallest priority of both open lists, which keeps the solution optimal
+
+FORWARD = 0
+BACKWARD = 1
+
+# open list and seen boards of one direction
+#   g is the cheapest cost found so far for every board seen (open or closed)
+#   parent is the index of the blank in the board each board was reached from
+#   open is the g of every open board, the three heaps are ordered on pr, f and g
+#   and entries that are no longer open with that g are skipped (lazy deletion)
+class Direction:
+    def __init__(self, key, blank, h):
+        self.g = {key : 0}
+        self.parent = {key : None}
+        self.open = {key : 0}
+        self.counter = 0
+        self.pr_heap = [(h, 0, 0, key, blank, h)]
+        self.f_heap = [(h, key, 0)]
+        self.g_heap = [(0, key, 0)]
+        self.states_evaluated = 0
+        self.max_frontier_size = 1
+
+    def push(self, key, blank, g, h, parent_blank):
+        self.g[key] = g
+        self.parent[key] = parent_blank
+        self.open[key] = g
+        self.counter += 1
+        heapq.heappush(self.pr_heap, (max(g + h, 2 * g), g, self.counter, key, blank, h))
+        heapq.heappush(self.f_heap, (g + h, key, g))
+        heapq.heappush(self.g_heap, (g, key, g))
+
+    # removes entries of boards that are closed or were reopened with a cheaper g
+    def clean(self, heap, key_index, g_index):
+        while heap and self.open.get(heap[0][key_index]) != heap[0][g_index]:
+            heapq.heappop(heap)
+
+    def min_priority(self):
+        self.clean(self.pr_heap, 3, 1)
+        return self.pr_heap[0][0] if self.pr_heap else None
+
+    def min_f(self):
+        self.clean(self.f_heap, 1, 2)
+        return self.f_heap[0][0] if self.f_heap else None
+
+    def min_g(self):
+        self.clean(self.g_heap, 1, 2)
+        return self.g_heap[0][0] if self.g_heap else None
+
+    # pops the open board with the smallest priority, returns (key, blank, g, h)
+    def pop(self):
+        self.clean(self.pr_heap, 3, 1)
+        pr, g, counter, key, blank, h = heapq.heappop(self.pr_heap)
+        del self.open[key]
+        return key, blank, g, h
+
+# function to do a bidirectional search from an initial state
+# returns the same dictionary as do_search in search.py plus the counters of each direction
+#   {solution : [solution states], path : [states], max_frontier_size : int, states_evaluated : int,
+#    states_evaluated_forward : int, states_evaluated_backward : int,
+#    max_frontier_size_forward : int, max_frontier_size_backward : int}
+def do_bidirectional_search(init_state):
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+        'states_evaluated_forward' : 0,
+        'states_evaluated_backward' : 0,
+        'max_frontier_size_forward' : 0,
+        'max_frontier_size_backward' : 0,
+    }
+    spec = init_state.spec
+    bits = spec.bits
+    move_table = spec.move_table
+    goal = spec.goal
+    heuristic_function = init_state.heuristic_function
+    delta = getattr(heuristic_function, 'delta', None)
+
+    # the spec each direction is heading to
+    specs = [spec, PuzzleSpec(spec.rows, spec.cols, init_state.puz)]
+
+    def heuristic(direction, puz):
+        if not heuristic_function:
+            return 0
+        return heuristic_function(State(puz, 0, None, spec = specs[direction]))
+    goal_key = spec.goal_key
+    directions = [Direction(init_state.key, init_state.blank, init_state.heuristic),
+                  Direction(goal_key, goal.index(0), heuristic(BACKWARD, goal))]
+    best_cost = 0 if init_state.key == goal_key else None
+    meeting_key = init_state.key
+
+    while best_cost is None or best_cost > 0:
+        priorities = [directions[FORWARD].min_priority(), directions[BACKWARD].min_priority()]
+        if priorities[FORWARD] is None or priorities[BACKWARD] is None:
+            break
+
+        lower_bound = max(min(priorities),
+                          directions[FORWARD].min_f(), directions[BACKWARD].min_f(),
+                          directions[FORWARD].min_g() + directions[BACKWARD].min_g() + 1)
+        if best_cost is not None and best_cost <= lower_bound:
+            break
+
+        # expands the direction with the smallest priority (forward on ties)
+        direction = FORWARD if priorities[FORWARD] <= priorities[BACKWARD] else BACKWARD
+        current = directions[direction]
+        other = directions[1 - direction]
+        key, blank, g, h = current.pop()
+        current.states_evaluated += 1
+
+        for tile_index in move_table[blank]:
+            child_key = move(key, blank, tile_index, bits)
+            child_g = g + 1
+            if child_key in current.g and current.g[child_key] <= child_g:
+                continue
+
+            if not heuristic_function:
+                child_h = 0
+            elif delta:
+                child_h = h + delta(specs[direction], tile_at(key, tile_index, bits), tile_index, blank)
+            else:
+                child_h = heuristic(direction, unpack(child_key, spec.size))
+            current.push(child_key, tile_index, child_g, child_h, blank)
+
+            # a board seen by both directions is a solution
+            if child_key in other.g:
+                cost = child_g + other.g[child_key]
+                if best_cost is None or cost < best_cost:
+                    best_cost = cost
+                    meeting_key = child_key
+
+        current.max_frontier_size = max(current.max_frontier_size, len(current.open))
+        res['max_frontier_size'] = max(res['max_frontier_size'], len(current.open) + len(other.open))
+
+    res['states_evaluated_forward'] = directions[FORWARD].states_evaluated
+    res['states_evaluated_backward'] = directions[BACKWARD].states_evaluated
+    res['states_evaluated'] = res['states_evaluated_forward'] + res['states_evaluated_backward']
+    res['max_frontier_size_forward'] = directions[FORWARD].max_frontier_size
+    res['max_frontier_size_backward'] = directions[BACKWARD].max_frontier_size
+
+    if best_cost is not None:
+        res['path'] = build_solution(init_state, directions, meeting_key)
+        res['solutions'].append(res['path'][-1])
+    return res
+
+# rebuilds the list of states from the initial state to the goal through the
+#   board where both directions met
+def build_solution(init_state, directions, meeting_key):
+    bits = init_state.spec.bits
+    meeting_blank = unpack(meeting_key, init_state.spec.size).index(0)
+
+    # forward half, walked back from the meeting board to the initial state
+    moves = []
+    key, blank = meeting_key, meeting_blank
+    parent_blank = directions[FORWARD].parent[key]
+    while parent_blank is not None:
+        moves.append(blank)
+        key = move(key, blank, parent_blank, bits)
+        blank = parent_blank
+        parent_blank = directions[FORWARD].parent[key]
+    moves.reverse()
+
+    # backward half, the parent of a board in the backward search is the next board towards the goal
+    key, blank = meeting_key, meeting_blank
+    parent_blank = directions[BACKWARD].parent[key]
+    while parent_blank is not None:
+        moves.append(parent_blank)
+        key = move(key, blank, parent_blank, bits)
+        blank = parent_blank
+        parent_blank = directions[BACKWARD].parent[key]
+
+    return build_path(init_state, moves)
@@ -0,0 +1,176 @@
+import os
+import sys
+import mmap
+from packed import unpack, move
+from state import build_path
+from ranking import rank_positions, get_pattern_size
+from puzzle_globals import Globals
+from atomic_file import atomic_open
+from puzzle_spec import PuzzleSpec, get_default_spec
+from symmetry import get_reflection, reflect_key
+
+# exact distance table for small boards (the 8 puzzle)
+#
+# a retrograde breadth first search from the goal gives the optimal number of moves
+#   of every solvable board, stored with one byte per board, so the optimal cost of a
+#   board is a single lookup and an optimal path is found by stepping to a neighbour
+#   one move closer to the goal, d lookups for a board d moves away
+#
+# a board is indexed by the lehmer rank (see ranking.py) of the positions of the
+#   tiles 0 .. size - 3, the last two tiles go in the two cells left and only one of
+#   their two orders is solvable (swapping two tiles changes the parity), so the
+#   table has size! / 2 entries: 181440 bytes for the 8 puzzle
+#   (boards that arent solvable share the index of a solvable one, check them first)
+
+# boards with more tiles dont fit (3 x 4 would need 239 million entries)
+MAX_TABLE_SIZE = 10
+
+UNREACHED = 255
+
+TABLE_MAGIC = b'NDST'
+
+def get_table_size(size):
+    return get_pattern_size(size - 2, size)
+
+# index of a packed board in the table of spec
+def rank_board(key, spec):
+    size = spec.size
+    puz = unpack(key, size)
+    positions = [0] * size
+    for index in range(size):
+        positions[puz[index]] = index
+    return rank_positions(positions[:size - 2], size)
+
+# breadth first search from the goal of spec over all the solvable boards
+#   with a diagonal symmetry (see symmetry.py) a board and its reflection get their
+#   distance at the same time and only the smaller of the two is expanded, so the
+#   layers hold about half of the boards
+# returns a bytearray with the number of moves of every board, indexed by rank_board
+def build_distance_table(spec):
+    if spec.size > MAX_TABLE_SIZE:
+        raise ValueError('no distance table for boards of more than %d tiles' % MAX_TABLE_SIZE)
+    bits = spec.bits
+    move_table = spec.move_table
+    res = bytearray([UNREACHED]) * get_table_size(spec.size)
+    res[rank_board(spec.goal_key, spec)] = 0
+
+    reflection = get_reflection(spec)
+    depth = 0
+    layer = [(spec.goal_key, spec.goal_index[0])]
+    while layer:
+        depth += 1
+        next_layer = []
+        for key, blank in layer:
+            for tile_index in move_table[blank]:
+                child = move(key, blank, tile_index, bits)
+                rank = rank_board(child, spec)
+                if res[rank] == UNREACHED:
+                    res[rank] = depth
+                    if reflection:
+                        mirror = reflect_key(child, spec)
+                        res[rank_board(mirror, spec)] = depth
+                        if mirror < child:
+                            next_layer.append((mirror, reflection[0][tile_index]))
+                            continue
+                    next_layer.append((child, tile_index))
+        layer = next_layer
+    return res
+
+def get_distance_table_path(spec, directory = None):
+    directory = directory or Globals.TABLES_DIR
+    name = 'distances_%dx%d_%s.bin' % (spec.rows, spec.cols, '-'.join(str(tile) for tile in spec.goal))
+    return os.path.join(directory, name)
+
+def get_distance_table_header(spec):
+    return TABLE_MAGIC + bytes([spec.rows, spec.cols]) + bytes(spec.goal)
+
+# file layout: magic, rows, cols, the goal tiles, one byte per board
+def write_distance_table(path, spec, table):
+    with atomic_open(path) as f:
+        f.write(get_distance_table_header(spec))
+        f.write(table)
+
+# memory maps a table file, returns (mmap, offset of the first board)
+def load_distance_table(path, spec):
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    header = get_distance_table_header(spec)
+    if data[:len(header)] != header or len(data) != len(header) + get_table_size(spec.size):
+        data.close()
+        raise ValueError('%s is not a distance table for %s' % (path, spec.goal))
+    return data, len(header)
+
+# exact distances of the boards of spec (default: the spec of the goal in puzzle_globals.py),
+#   loaded from directory (built and saved first if missing)
+# can be used as a (perfect) heuristic_function
+class DistanceTable:
+    def __init__(self, spec = None, directory = None):
+        self.spec = spec or get_default_spec()
+        path = get_distance_table_path(self.spec, directory)
+        if not os.path.exists(path):
+            write_distance_table(path, self.spec, build_distance_table(self.spec))
+        self.data, self.offset = load_distance_table(path, self.spec)
+
+    # optimal number of moves of a solvable packed board
+    def cost(self, key):
+        return self.data[self.offset + rank_board(key, self.spec)]
+
+    def __call__(self, state):
+        if state.spec.goal_key != self.spec.goal_key:
+            raise ValueError('distance table built for a different goal')
+        return self.cost(state.key)
+
+    # optimal path (list of states) from init_state to the goal
+    def get_path(self, init_state):
+        bits = self.spec.bits
+        key, blank = init_state.key, init_state.blank
+        cost = self.cost(key)
+        moves = []
+        while cost > 0:
+            for tile_index in self.spec.move_table[blank]:
+                child = move(key, blank, tile_index, bits)
+                if self.cost(child) == cost - 1:
+                    break
+            moves.append(tile_index)
+            key, blank, cost = child, tile_index, cost - 1
+        # an unsolvable board ends on the goal with two tiles swapped
+        if key != self.spec.goal_key:
+            raise ValueError('board is not solvable')
+        return build_path(init_state, moves)
+
+# tables of this process, one per spec
+_tables = {}
+
+def get_distance_table(spec = None, directory = None):
+    spec = spec or get_default_spec()
+    cache_key = (spec.rows, spec.cols, tuple(spec.goal), directory)
+    if not cache_key in _tables:
+        _tables[cache_key] = DistanceTable(spec, directory)
+    return _tables[cache_key]
+
+# solves init_state by following the distance table of its spec
+# returns the same dictionary as do_search in search.py, states_evaluated is the
+#   number of boards on the path
+def do_table_search(init_state, directory = None):
+    path = get_distance_table(init_state.spec, directory).get_path(init_state)
+    return {
+        'solutions' : [path[-1]],
+        'path' : path,
+        'max_frontier_size' : 0,
+        'states_evaluated' : len(path),
+    }
+
+# builds the table of a board and prints the number of boards at each distance
+#   py distance_table.py [rows cols] (default: the goal in puzzle_globals.py)
+def main():
+    spec = PuzzleSpec(int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else get_default_spec()
+    table = get_distance_table(spec)
+    counts = {}
+    for index in range(get_table_size(spec.size)):
+        cost = table.data[table.offset + index]
+        counts[cost] = counts.get(cost, 0) + 1
+    for cost in sorted(counts):
+        print(cost, counts[cost])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import os
+import sys
+import mmap
+import heapq
+import shutil
+import tempfile
+from packed import tile_at, move
+from state import State, build_path
+from puzzle_spec import PuzzleSpec
+
+# disk backed breadth first search with delayed duplicate detection
+#
+# do_search keeps its whole frontier and closed table in memory, which runs out long
+#   before a breadth first search of the 15 puzzle finishes, this search keeps every
+#   layer (all the boards at one depth) in a file instead
+# a layer file is the sorted list of the packed boards (see packed.py) of the layer,
+#   each written as a fixed width big endian number so the byte order of the records
+#   is their numeric order
+#
+# layer d + 1 is built from layer d
+#   - the children of the boards of layer d are generated memory_records at a time,
+#     each chunk is sorted, its duplicates removed and written as a sorted run file
+#   - the runs are merged, and the boards also in layer d or d - 1 are dropped while
+#     merging (the parent of a board is always in the layer before it), so duplicates
+#     are only detected once per layer, on disk, with sequential reads
+# only memory_records children are in memory at once, whatever the size of the layers
+#
+# the solution path is rebuilt from the goal backwards: in each earlier layer the
+#   parent of the current board is one of its neighbours, found with a binary search
+#   of the memory mapped layer file
+
+# bytes of a record of a board with size tiles of bits bits
+def get_record_width(size, bits):
+    return (size * bits + 7) // 8
+
+def get_layer_path(directory, depth):
+    return os.path.join(directory, 'layer_%04d.bin' % depth)
+
+# writes sorted packed boards to a file
+def write_records(path, keys, width):
+    with open(path, 'wb') as f:
+        for start in range(0, len(keys), 65536):
+            f.write(b''.join(key.to_bytes(width, 'big') for key in keys[start : start + 65536]))
+
+# yields the packed boards of a file in order, reading block_records at a time
+def read_records(path, width, block_records = 65536):
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(width * block_records)
+            if not block:
+                return
+            for start in range(0, len(block), width):
+                yield int.from_bytes(block[start : start + width], 'big')
+
+def count_records(path, width):
+    return os.path.getsize(path) // width
+
+# binary search for a packed board in a memory mapped sorted file
+def contains_record(data, key, width):
+    record = key.to_bytes(width, 'big')
+    low, high = 0, len(data) // width
+    while low < high:
+        middle = (low + high) // 2
+        value = data[middle * width : (middle + 1) * width]
+        if value < record:
+            low = middle + 1
+        elif value > record:
+            high = middle
+        else:
+            return True
+    return False
+
+# yields the items of the sorted iterator keys that are in none of the sorted iterators excluded
+#   (repeated items of keys are yielded once)
+def sorted_difference(keys, excluded):
+    excluded = heapq.merge(*excluded)
+    current = next(excluded, None)
+    previous = None
+    for key in keys:
+        if key == previous:
+            continue
+        previous = key
+        while current is not None and current < key:
+            current = next(excluded, None)
+        if current != key:
+            yield key
+
+def get_blank(key, size, bits):
+    for index in range(size):
+        if tile_at(key, index, bits) == 0:
+            return index
+
+# all the children of the boards of a layer file, as sorted run files of at most memory_records boards
+def write_successor_runs(layer_path, directory, depth, spec, width, memory_records):
+    size, bits, move_table = spec.size, spec.bits, spec.move_table
+    runs = []
+    children = []
+
+    def write_run():
+        path = os.path.join(directory, 'run_%04d_%04d.bin' % (depth, len(runs)))
+        write_records(path, sorted(set(children)), width)
+        runs.append(path)
+        children.clear()
+
+    for key in read_records(layer_path, width):
+        blank = get_blank(key, size, bits)
+        for tile_index in move_table[blank]:
+            children.append(move(key, blank, tile_index, bits))
+        if len(children) >= memory_records:
+            write_run()
+    if children or not runs:
+        write_run()
+    return runs
+
+# builds layer depth + 1 from layer depth (and depth - 1), returns (number of boards, goal found)
+def expand_layer(directory, depth, spec, width, memory_records):
+    runs = write_successor_runs(get_layer_path(directory, depth), directory, depth, spec, width, memory_records)
+    excluded = [read_records(get_layer_path(directory, d), width) for d in (depth, depth - 1) if d >= 0]
+    merged = sorted_difference(heapq.merge(*[read_records(run, width) for run in runs]), excluded)
+
+    count = 0
+    found = False
+    buffer = []
+    with open(get_layer_path(directory, depth + 1), 'wb') as f:
+        for key in merged:
+            count += 1
+            found = found or key == spec.goal_key
+            buffer.append(key.to_bytes(width, 'big'))
+            if len(buffer) >= 65536:
+                f.write(b''.join(buffer))
+                buffer.clear()
+        f.write(b''.join(buffer))
+
+    for run in runs:
+        os.remove(run)
+    return count, found
+
+# rebuilds the path from init_state to the goal at depth from the layer files
+def get_external_solution_path(init_state, directory, depth, width):
+    spec = init_state.spec
+    bits = spec.bits
+    moves = []
+    key, blank = spec.goal_key, spec.goal_index[0]
+    for d in range(depth - 1, -1, -1):
+        with open(get_layer_path(directory, d), 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        try:
+            for tile_index in spec.move_table[blank]:
+                parent_key = move(key, blank, tile_index, bits)
+                if contains_record(data, parent_key, width):
+                    moves.append(blank)
+                    key, blank = parent_key, tile_index
+                    break
+        finally:
+            data.close()
+    moves.reverse()
+    return build_path(init_state, moves)
+
+# breadth first search from init_state with the layers on disk (the heuristic is not used)
+#   directory keeps the layer files (default: a temporary directory removed at the end)
+#   memory_records is the number of children sorted in memory at once
+#   with find_goal = False the search enumerates every board reachable from init_state
+# returns the dictionary of do_search in search.py (max_frontier_size is the largest
+#   layer) with layer_sizes : [number of boards at each depth]
+def do_external_search(init_state, directory = None, memory_records = 1 << 20, find_goal = True):
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 1,
+        'states_evaluated' : 0,
+        'layer_sizes' : [1],
+    }
+    spec = init_state.spec
+    width = get_record_width(spec.size, spec.bits)
+    temporary = directory is None
+    directory = directory or tempfile.mkdtemp(prefix = 'npuzzle_bfs_')
+    os.makedirs(directory, exist_ok = True)
+
+    try:
+        write_records(get_layer_path(directory, 0), [init_state.key], width)
+        depth = 0
+        found = init_state.is_goal()
+        while not (found and find_goal):
+            res['states_evaluated'] += res['layer_sizes'][depth]
+            count, found = expand_layer(directory, depth, spec, width, memory_records)
+            if count == 0:
+                break
+            depth += 1
+            res['layer_sizes'].append(count)
+            res['max_frontier_size'] = max(res['max_frontier_size'], count)
+
+        if found and find_goal:
+            res['path'] = get_external_solution_path(init_state, directory, depth, width)
+            res['solutions'].append(res['path'][-1])
+    finally:
+        if temporary:
+            shutil.rmtree(directory)
+    return res
+
+# number of boards at every distance from the goal of a rows x cols board
+#   py external_bfs.py <rows> <cols> [directory] [memory records]
+def main():
+    rows, cols = int(sys.argv[1]), int(sys.argv[2])
+    directory = sys.argv[3] if len(sys.argv) > 3 else None
+    memory_records = int(sys.argv[4]) if len(sys.argv) > 4 else 1 << 20
+    spec = PuzzleSpec(rows, cols)
+    res = do_external_search(State(list(spec.goal), 0, None, spec = spec), directory, memory_records, find_goal = False)
+    for depth in range(len(res['layer_sizes'])):
+        print(depth, res['layer_sizes'][depth])
+    print('total', sum(res['layer_sizes']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+import sys
+import time
+import heapq
+import queue
+import random
+import multiprocessing
+from packed import tile_at, move
+from state import State, build_path
+from instances import random_solvable_puzzle
+from puzzle_spec import get_spec
+from puzzle_globals import Globals
+
+# hash distributed A* (HDA*, Kishimoto, Fukunaga and Botea 2009)
+#
+# every worker process owns the boards whose zobrist hash modulo the number of workers
+#   is its index, it keeps the open list and closed table of its boards only and runs
+#   A* on them, children owned by another worker are sent to it in batches through a
+#   message queue (every worker has one inbox)
+# a node is (f, h, packed board, blank, g, zobrist hash, moves), moves is the string of
+#   the moves from the initial board (see get_moves in state.py), so the solution path
+#   doesnt need the closed tables of the other workers
+#
+# the cost of the best solution found (the incumbent) is shared by all the workers,
+#   nodes with f >= incumbent are dropped, so with an admissible heuristic the
+#   incumbent is optimal once no worker has a node with a smaller f left
+# termination: a worker is idle when it has nothing to expand and its inbox is empty,
+#   every worker counts the batches it sent and received, the search is over when all
+#   the workers are idle and all the batches sent were received, checked twice in a row
+#   with the same counts so a batch in flight between the checks isnt missed
+
+# time (seconds) an idle worker waits on its inbox before checking the stop flag
+IDLE_WAIT = 0.005
+
+# children sent to another worker in one message
+BATCH_SIZE = 256
+
+# nodes expanded between two reads of the inbox
+EXPANSIONS_PER_ROUND = 256
+
+INFINITY = 1 << 30
+
+# seconds the workers get to send their stats and exit once the search is over
+WORKER_EXIT_WAIT = 5
+
+# random 64 bit number of every (tile, index), the hash of a board is the xor of the
+#   numbers of its tiles, seeded so every worker has the same table
+def get_zobrist_table(size, seed = 0):
+    rng = random.Random(seed)
+    return [[rng.getrandbits(64) for index in range(size)] for tile in range(size)]
+
+def zobrist_hash(key, spec, table):
+    res = 0
+    for index in range(spec.size):
+        res ^= table[tile_at(key, index, spec.bits)][index]
+    return res
+
+# letter of a move of the blank from blank to tile_index (see get_moves in state.py)
+def get_move_letter(blank, tile_index, cols):
+    difference = tile_index - blank
+    if difference == -cols: return 'U'
+    if difference == -1: return 'L'
+    if difference == cols: return 'D'
+    return 'R'
+
+# tile indices moved into the blank by a string of moves
+def get_move_indices(moves, blank, cols):
+    offsets = {'U' : -cols, 'L' : -1, 'D' : cols, 'R' : 1}
+    res = []
+    for letter in moves:
+        blank += offsets[letter]
+        res.append(blank)
+    return res
+
+def hda_worker(index, n_workers, spec, heuristic_function, inboxes, incumbent, sent, received, idle, stop, results):
+    inbox = inboxes[index]
+    bits, cols, goal_key = spec.bits, spec.cols, spec.goal_key
+    move_table = spec.move_table
+    delta = getattr(heuristic_function, 'delta', None)
+    zobrist = get_zobrist_table(spec.size)
+    # numbers of the blank (tile 0), it moves too
+    blank_zobrist = zobrist[0]
+
+    frontier = []
+    closed = {}
+    counter = 0
+    expanded = 0
+    max_frontier_size = 0
+    buffers = [[] for i in range(n_workers)]
+
+    def add(node):
+        nonlocal counter
+        f, h, key, blank, g, zobrist_key, moves = node
+        if f >= incumbent.value:
+            return
+        known = closed.get(key)
+        if known is not None and known <= g:
+            return
+        closed[key] = g
+        counter += 1
+        heapq.heappush(frontier, (f, h, -counter, key, blank, g, zobrist_key, moves))
+
+    def flush():
+        for owner in range(n_workers):
+            if buffers[owner]:
+                # counted before it is sent so the batch is never in flight uncounted
+                sent[index] += 1
+                inboxes[owner].put(buffers[owner])
+                buffers[owner] = []
+
+    def receive(batch):
+        # marked busy before counting the batch as received (see termination above)
+        idle[index] = 0
+        received[index] += 1
+        for node in batch:
+            add(node)
+
+    while not stop.is_set():
+        while True:
+            try:
+                batch = inbox.get_nowait()
+            except queue.Empty:
+                break
+            receive(batch)
+
+        for expansion in range(EXPANSIONS_PER_ROUND):
+            if not frontier:
+                break
+            f, h, c, key, blank, g, zobrist_key, moves = heapq.heappop(frontier)
+            if f >= incumbent.value:
+                # every other node has an f at least as big
+                frontier.clear()
+                break
+            if closed[key] != g:
+                continue
+            if key == goal_key:
+                with incumbent.get_lock():
+                    if g < incumbent.value:
+                        incumbent.value = g
+                        results.put(('solution', g, moves))
+                continue
+
+            expanded += 1
+            for tile_index in move_table[blank]:
+                tile = tile_at(key, tile_index, bits)
+                child_key = move(key, blank, tile_index, bits)
+                if delta:
+                    child_h = h + delta(spec, tile, tile_index, blank)
+                elif heuristic_function:
+                    child_h = heuristic_function(State(child_key, g + 1, blank, blank = tile_index, spec = spec))
+                else:
+                    child_h = 0
+                child_zobrist = zobrist_key ^ zobrist[tile][tile_index] ^ zobrist[tile][blank] ^ blank_zobrist[blank] ^ blank_zobrist[tile_index]
+                node = (g + 1 + child_h, child_h, child_key, tile_index, g + 1, child_zobrist, moves + get_move_letter(blank, tile_index, cols))
+                owner = child_zobrist % n_workers
+                if owner == index:
+                    add(node)
+                else:
+                    buffers[owner].append(node)
+                    if len(buffers[owner]) >= BATCH_SIZE:
+                        flush()
+            max_frontier_size = max(max_frontier_size, len(frontier))
+        flush()
+
+        if not frontier:
+            idle[index] = 1
+            try:
+                receive(inbox.get(timeout = IDLE_WAIT))
+            except queue.Empty:
+                pass
+
+    results.put(('stats', index, expanded, max_frontier_size))
+
+# parallel A* from init_state with n_workers processes (default: number of cores)
+#   the heuristic of init_state must be admissible for the solution to be optimal
+# returns the same dictionary as do_search in search.py, with workers : [{states_evaluated,
+#   max_frontier_size}] for each worker (the totals are the sums over the workers)
+def do_hda_search(init_state, workers = None):
+    n_workers = workers or multiprocessing.cpu_count()
+    spec = init_state.spec
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+        'workers' : [],
+    }
+    if init_state.is_goal():
+        res['path'] = [init_state]
+        res['solutions'].append(init_state)
+        return res
+
+    # fork so the heuristic (and its memory mapped tables) doesnt have to be pickled
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else multiprocessing
+    inboxes = [context.Queue() for i in range(n_workers)]
+    results = context.Queue()
+    incumbent = context.Value('q', INFINITY)
+    # the last counter is the batch of the initial node sent by this process
+    sent = context.Array('q', n_workers + 1, lock = False)
+    received = context.Array('q', n_workers, lock = False)
+    idle = context.Array('b', n_workers, lock = False)
+    stop = context.Event()
+
+    processes = [context.Process(target = hda_worker, args = (index, n_workers, spec, init_state.heuristic_function, inboxes,
+                                                              incumbent, sent, received, idle, stop, results), daemon = True)
+                 for index in range(n_workers)]
+    for process in processes:
+        process.start()
+
+    zobrist_key = zobrist_hash(init_state.key, spec, get_zobrist_table(spec.size))
+    sent[n_workers] += 1
+    inboxes[zobrist_key % n_workers].put([(init_state.heuristic, init_state.heuristic, init_state.key, init_state.blank, 0, zobrist_key, '')])
+
+    best = None
+    previous = None
+    try:
+        while True:
+            try:
+                message = results.get(timeout = IDLE_WAIT)
+                if message[0] == 'solution' and (best is None or message[1] < best[0]):
+                    best = message[1:]
+                continue
+            except queue.Empty:
+                pass
+            if not all(process.is_alive() for process in processes):
+                raise RuntimeError('an HDA* worker process died')
+            counts = (sum(sent), sum(received))
+            current = counts if counts[0] == counts[1] and all(idle) else None
+            if current and current == previous:
+                break
+            previous = current
+    finally:
+        # also when this process is interrupted (e.g. by the timeout of batch.py), so
+        #   no worker is left running, workers that dont stop in time are terminated
+        stop.set()
+        deadline = time.perf_counter() + WORKER_EXIT_WAIT
+        while len(res['workers']) < n_workers:
+            try:
+                message = results.get(timeout = max(0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if message[0] == 'stats':
+                res['workers'].append({'states_evaluated' : message[2], 'max_frontier_size' : message[3]})
+            elif best is None or message[1] < best[0]:
+                best = message[1:]
+        for process in processes:
+            process.join(max(0, deadline - time.perf_counter()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for inbox in inboxes + [results]:
+            inbox.cancel_join_thread()
+
+    res['states_evaluated'] = sum(worker['states_evaluated'] for worker in res['workers'])
+    res['max_frontier_size'] = sum(worker['max_frontier_size'] for worker in res['workers'])
+    if best:
+        res['path'] = build_path(init_state, get_move_indices(best[1], init_state.blank, spec.cols))
+        res['solutions'].append(res['path'][-1])
+    return res
+
+# times HDA* on samples with 1 .. max_workers processes
+#   heuristic is a name in HEURISTICS of algorithms.py
+# returns a list of {workers, time, speedup, states_evaluated}, time is the total over the
+#   samples and speedup is relative to the single process A* (do_search) with the same heuristic
+def get_scaling(samples, heuristic = 'manhattan_distance', max_workers = None, spec = None):
+    # imported here since algorithms.py imports this module
+    from algorithms import get_heuristic
+    from search import do_search
+    spec = spec or get_spec(Globals.GOAL)
+    heuristic_function = get_heuristic(heuristic, spec)
+    max_workers = max_workers or multiprocessing.cpu_count()
+
+    sequential_time = 0
+    sequential_states = 0
+    for sample in samples:
+        start = time.perf_counter()
+        sol = do_search(State(list(sample), 0, None, heuristic_function, spec = spec))
+        sequential_time += time.perf_counter() - start
+        sequential_states += sol['states_evaluated']
+
+    res = [{'workers' : 0, 'time' : sequential_time, 'speedup' : 1.0, 'states_evaluated' : sequential_states}]
+    for workers in range(1, max_workers + 1):
+        elapsed = 0
+        states_evaluated = 0
+        for sample in samples:
+            start = time.perf_counter()
+            sol = do_hda_search(State(list(sample), 0, None, heuristic_function, spec = spec), workers)
+            elapsed += time.perf_counter() - start
+            states_evaluated += sol['states_evaluated']
+        res.append({'workers' : workers, 'time' : elapsed, 'speedup' : sequential_time / elapsed, 'states_evaluated' : states_evaluated})
+    return res
+
+# scaling of HDA* on random samples of the goal in puzzle_globals.py, like main in puzzle.py
+#   py hda_star.py <sample size> [max workers] (workers 0 is the single process A*)
+def main():
+    sample_size = int(sys.argv[1])
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    spec = get_spec(Globals.GOAL)
+    samples = [random_solvable_puzzle(spec) for i in range(sample_size)]
+    for row in get_scaling(samples, max_workers = max_workers, spec = spec):
+        print('workers %2d  time %8.3fs  speedup %5.2f  states evaluated %s' % (row['workers'], row['time'], row['speedup'], row['states_evaluated']))
+
+if __name__ == '__main__':
+    main()
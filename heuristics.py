@@ -0,0 +1,196 @@
+import os
+import pickle
+import itertools
+import collections
+from puzzle_globals import Globals
+from atomic_file import atomic_open
+
+# heuristics for the n puzzle
+# every heuristic takes a state and returns an estimate of the number of moves
+#   left to reach the goal of the state's spec (see puzzle_spec.py)
+#   the goal positions and distances come from lookup tables built once per spec
+#
+# a heuristic can also have a delta function attached to it (heuristic.delta)
+#   delta(spec, tile, from_index, to_index) returns the change of the heuristic value
+#   when tile moves from from_index to to_index (into the blank)
+#   State.expand uses it to compute the heuristic of a child from its parent in O(1)
+
+# n puzzle misplaced tiles heuristic
+# returns the sum of all the misplaced tiles in the state compared to the goal
+def h_misplaced_tiles(state):
+    res = 0
+    puz = state.puz
+    goal = state.spec.goal
+    for tiles_index in range(len(puz)):
+        if puz[tiles_index] == 0: continue
+        if puz[tiles_index] != goal[tiles_index]:
+            res += 1
+    return res
+
+def h_misplaced_tiles_delta(spec, tile, from_index, to_index):
+    goal = spec.goal
+    return (goal[to_index] != tile) - (goal[from_index] != tile)
+
+h_misplaced_tiles.delta = h_misplaced_tiles_delta
+
+# n puzzle manhattan distance heuristic
+# returns the sum of manhattan distance of all the tiles in the state compared to the goal
+def h_manhattan_distance(state):
+    res = 0
+    puz = state.puz
+    distance = state.spec.distance
+    for state_index in range(len(puz)):
+        tile_value = puz[state_index]
+        if tile_value != 0:
+            res += distance[tile_value][state_index]
+    return res
+
+def h_manhattan_distance_delta(spec, tile, from_index, to_index):
+    distance = spec.distance[tile]
+    return distance[to_index] - distance[from_index]
+
+h_manhattan_distance.delta = h_manhattan_distance_delta
+
+# number of tiles to remove from sequence so the rest is increasing (len - longest increasing subsequence)
+def count_conflicts(sequence):
+    longest = []
+    for i in range(len(sequence)):
+        longest.append(1 + max([longest[j] for j in range(i) if sequence[j] < sequence[i]] or [0]))
+    return len(sequence) - max(longest or [0])
+
+# linear conflict table, built once per spec
+#   two tiles that are both in their goal row but in the wrong order, one of them has
+#   to leave the row and come back (2 extra moves on top of the manhattan distance)
+#   conflicts[sequence] is the minimum number of tiles to take out of a line so the
+#   rest is in increasing order, sequence is the tuple of goal columns (goal rows for
+#   a column) of the tiles of a line that belong to that line, from left to right
+def get_conflict_table(spec):
+    if 'linear_conflict' in spec.tables:
+        return spec.tables['linear_conflict']
+
+    line_length = max(spec.rows, spec.cols)
+    conflicts = {}
+    for length in range(line_length + 1):
+        for sequence in itertools.permutations(range(line_length), length):
+            conflicts[sequence] = count_conflicts(sequence)
+
+    spec.tables['linear_conflict'] = conflicts
+    return conflicts
+
+# n puzzle manhattan distance + linear conflict heuristic
+# returns the manhattan distance plus 2 moves for every tile that has to leave its goal
+#   row or column to let another tile of the same line pass
+def h_linear_conflict(state):
+    puz = state.puz
+    spec = state.spec
+    goal_row = spec.goal_row
+    goal_col = spec.goal_col
+    conflicts = get_conflict_table(spec)
+    total_rows = spec.rows
+    total_cols = spec.cols
+
+    res = h_manhattan_distance(state)
+    for row in range(total_rows):
+        sequence = []
+        for col in range(total_cols):
+            tile = puz[row * total_cols + col]
+            if tile != 0 and goal_row[tile] == row:
+                sequence.append(goal_col[tile])
+        res += 2 * conflicts[tuple(sequence)]
+
+    for col in range(total_cols):
+        sequence = []
+        for row in range(total_rows):
+            tile = puz[row * total_cols + col]
+            if tile != 0 and goal_col[tile] == col:
+                sequence.append(goal_row[tile])
+        res += 2 * conflicts[tuple(sequence)]
+    return res
+
+# walking distance tables
+#   the rows are looked at as lines of tiles where only the goal row of each tile
+#   matters, a state is the number of tiles of each goal row in every row plus the
+#   row of the blank, and a vertical move takes a tile from the row above or below into
+#   the row of the blank
+#   the walking distance of the rows is the number of vertical moves needed to put
+#   every tile in its goal row (found once with a breadth first search from the goal
+#   and cached on disk), the columns work the same with horizontal moves
+#   h = walking distance of the rows + walking distance of the columns
+
+# breadth first search over the line states from the goal
+#   lines is the number of lines, line_length the number of cells of a line
+#   blank_line is the line of the blank in the goal
+# returns {(counts of line 0 ..., counts of line 1 ..., ..., blank line) : moves}
+def build_walking_distance_table(lines, line_length, blank_line):
+    counts = [0] * (lines * lines)
+    for line in range(lines):
+        counts[line * lines + line] = line_length - (1 if line == blank_line else 0)
+    start = tuple(counts) + (blank_line,)
+
+    res = {start : 0}
+    queue = collections.deque([start])
+    while queue:
+        current = queue.popleft()
+        blank = current[-1]
+        for line in (blank - 1, blank + 1):
+            if line < 0 or line >= lines: continue
+            for tile_class in range(lines):
+                if current[line * lines + tile_class] == 0: continue
+                # moves a tile of tile_class from line into the line of the blank
+                child = list(current)
+                child[line * lines + tile_class] -= 1
+                child[blank * lines + tile_class] += 1
+                child[-1] = line
+                child = tuple(child)
+                if not child in res:
+                    res[child] = res[current] + 1
+                    queue.append(child)
+    return res
+
+# loads a walking distance table from Globals.TABLES_DIR, building and saving it if missing
+def load_walking_distance_table(lines, line_length, blank_line):
+    path = os.path.join(Globals.TABLES_DIR, 'wd_%dx%d_%d.pkl' % (lines, line_length, blank_line))
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    table = build_walking_distance_table(lines, line_length, blank_line)
+    with atomic_open(path) as f:
+        pickle.dump(table, f, pickle.HIGHEST_PROTOCOL)
+    return table
+
+# walking distance tables of the rows and of the columns of a spec
+def get_walking_distance_tables(spec):
+    if 'walking_distance' in spec.tables:
+        return spec.tables['walking_distance']
+
+    blank_index = spec.goal_index[0]
+    tables = {
+        'rows' : load_walking_distance_table(spec.rows, spec.cols, blank_index // spec.cols),
+        'cols' : load_walking_distance_table(spec.cols, spec.rows, blank_index % spec.cols),
+    }
+    spec.tables['walking_distance'] = tables
+    return tables
+
+# n puzzle walking distance heuristic
+# returns the walking distance of the rows plus the walking distance of the columns
+def h_walking_distance(state):
+    puz = state.puz
+    spec = state.spec
+    tables = get_walking_distance_tables(spec)
+    goal_row = spec.goal_row
+    goal_col = spec.goal_col
+    total_rows = spec.rows
+    total_cols = spec.cols
+
+    row_counts = [0] * (total_rows * total_rows)
+    col_counts = [0] * (total_cols * total_cols)
+    for index in range(len(puz)):
+        tile = puz[index]
+        if tile == 0: continue
+        row_counts[(index // total_cols) * total_rows + goal_row[tile]] += 1
+        col_counts[(index % total_cols) * total_cols + goal_col[tile]] += 1
+
+    blank_index = state.blank
+    return tables['rows'][tuple(row_counts) + (blank_index // total_cols,)] + \
+           tables['cols'][tuple(col_counts) + (blank_index % total_cols,)]
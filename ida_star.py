@@ -0,0 +1,76 @@
+from state import *
+
+# iterative deepening A* search from an initial state
+# uses the heuristic function of init_state, there is no frontier and no
+#   duplicates dict, the board is a single list that is changed in place
+#   (move, search deeper, undo the move) so memory is linear in the solution depth
+# returns the same dictionary as do_search in search.py
+#   {solution : [solution states], path : [states], max_frontier_size : int, states_eval : int}
+#   since there is no frontier max_frontier_size is the deepest path explored
+# order is an optional move ordering (see order_by_heuristic in state.py), trying the
+#   most promising moves first finds the goal earlier in the last iteration
+def do_ida_search(init_state, order = None):
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+    }
+    puz = init_state.puz
+    spec = init_state.spec
+    goal = spec.goal
+    successors = spec.successors
+    heuristic_function = init_state.heuristic_function
+    delta = getattr(heuristic_function, 'delta', None)
+
+    # list of the tile indices moved into the blank, from the initial state
+    path = []
+
+    # heuristic value of the board after moving the tile at tile_index into blank_index
+    def child_heuristic(h, blank_index, tile_index):
+        if not heuristic_function:
+            return 0
+        if delta:
+            return h + delta(spec, puz[blank_index], tile_index, blank_index)
+        return heuristic_function(State(puz, 0, None, spec = spec))
+
+    # depth first search bounded by f = g + h <= bound
+    # returns the smallest f that went over the bound or -1 if the goal was found
+    def search(g, h, bound, blank_index, prev_blank_index):
+        f = g + h
+        if f > bound:
+            return f
+
+        res['states_evaluated'] += 1
+        res['max_frontier_size'] = max(res['max_frontier_size'], len(path))
+        if h == 0 and puz == goal:
+            return -1
+
+        minimum = None
+        # the successor table leaves out moving the tile back to where it came from
+        #   (the inverse of the previous move)
+        moves = successors[blank_index][prev_blank_index]
+        if order:
+            moves = [tile_index for tile_index, d in order([(tile_index, delta(spec, puz[tile_index], tile_index, blank_index) if delta else None)
+                                                            for tile_index in moves])]
+        for tile_index in moves:
+            puz[blank_index], puz[tile_index] = puz[tile_index], 0
+            path.append(tile_index)
+            t = search(g + 1, child_heuristic(h, blank_index, tile_index), bound, tile_index, blank_index)
+            if t == -1:
+                return -1
+            # undo the move
+            path.pop()
+            puz[tile_index], puz[blank_index] = puz[blank_index], 0
+
+            if minimum is None or t < minimum:
+                minimum = t
+        return minimum
+
+    bound = init_state.heuristic
+    while bound is not None:
+        bound = search(0, init_state.heuristic, bound, init_state.blank, None)
+        if bound == -1:
+            res['path'] = build_path(init_state, path)
+            res['solutions'].append(res['path'][-1])
+            break
+    return res
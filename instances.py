@@ -0,0 +1,89 @@
+import random
+from state import State
+from packed import pack
+from heuristics import h_manhattan_distance
+from ida_star import do_ida_search
+from distance_table import get_distance_table, MAX_TABLE_SIZE
+from puzzle_spec import get_default_spec
+
+# generation of n puzzle instances
+#
+# a board can reach the goal only if the parity of the permutation from the goal to
+#   the board (blank included) is the same as the parity of the manhattan distance
+#   between the blank and its goal position, every move swaps the blank with a tile
+#   (one transposition) and moves the blank by one cell so both parities flip together
+
+# counts the inversions of a list of distinct numbers with a merge sort in O(n log n)
+def count_inversions(seq):
+    if len(seq) < 2:
+        return list(seq), 0
+    middle = len(seq) // 2
+    left, res = count_inversions(seq[:middle])
+    right, right_inversions = count_inversions(seq[middle:])
+    res += right_inversions
+
+    merged = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] <= right[j]:
+            merged.append(left[i])
+            i += 1
+        else:
+            # every item left in left is bigger than right[j]
+            merged.append(right[j])
+            res += len(left) - i
+            j += 1
+    merged.extend(left[i:])
+    merged.extend(right[j:])
+    return merged, res
+
+# checks whether puz can reach the goal of spec (default: the square board with the goal
+#   in puzzle_globals.py), works for any board shape
+def is_solvable(puz, spec = None):
+    spec = spec or get_default_spec()
+    goal_index = spec.goal_index
+
+    inversions = count_inversions([goal_index[tile] for tile in puz])[1]
+    blank_index = puz.index(0)
+    blank_distance = abs(blank_index // spec.cols - spec.goal_row[0]) + \
+                     abs(blank_index % spec.cols - spec.goal_col[0])
+    return inversions % 2 == blank_distance % 2
+
+# creates a random solvable config of the puzzle, uniformly among all solvable configs
+# a random permutation is solvable half of the time, swapping two tiles (not the blank)
+#   changes the parity so it maps the unsolvable configs one to one onto the solvable ones
+def random_solvable_puzzle(spec, rng = random):
+    res = list(spec.goal)
+    rng.shuffle(res)
+    if not is_solvable(res, spec):
+        first, second = [index for index in range(len(res)) if res[index] != 0][:2]
+        res[first], res[second] = res[second], res[first]
+    return res
+
+# creates a random config of the puzzle that is depth moves away from the goal of spec
+#   random walks of depth moves (never undoing the previous move) are solved with
+#   IDA* and the first one whose optimal solution is exactly depth moves is returned
+#   (a walk can only be shorter than depth, or depth - 2, depth - 4 ...)
+#   boards small enough for an exact distance table (see distance_table.py) look
+#   up the optimal cost instead, unless use_table is False
+# returns None if no walk of max_tries had the exact depth
+def puzzle_at_depth(spec, depth, rng = random, max_tries = 1000, use_table = True):
+    move_table = spec.move_table
+    table = get_distance_table(spec) if use_table and spec.size <= MAX_TABLE_SIZE else None
+    for tries in range(max_tries):
+        res = list(spec.goal)
+        blank_index = res.index(0)
+        previous_index = None
+        for n_moves in range(depth):
+            tile_index = rng.choice([index for index in move_table[blank_index] if index != previous_index])
+            res[blank_index], res[tile_index] = res[tile_index], 0
+            previous_index, blank_index = blank_index, tile_index
+
+        if table:
+            if table.cost(pack(res)) == depth:
+                return res
+            continue
+        sol = do_ida_search(State(res, 0, None, h_manhattan_distance, spec = spec))
+        if sol['solutions'][0].cost == depth:
+            return res
+    return None
@@ -0,0 +1,124 @@
+import io
+import time
+import pstats
+import cProfile
+
+# optional instrumentation of do_search (see search.py)
+#
+# do_search only pays for it when it is given a SearchStats, then it runs an
+#   instrumented copy of its loop that counts and times every phase, without
+#   one the plain loop runs and nothing is measured:
+#     stats = SearchStats(progress = print_progress, profile = True)
+#     res = do_search(init_state, stats = stats)
+#     res['stats']  ->  {'counters' : {...}, 'timers' : {...}, 'elapsed' : seconds}
+#
+# counters
+#   expanded : states taken from the open list and expanded
+#   generated : children (moves) generated by the expansions, a State is only made for the pushed ones
+#   duplicates : children dropped since their board was already reached at the same or a lower cost
+#   reopenings : children of an already reached board pushed again for a cheaper path
+#   pushes, pops : operations on the open list (pops of lazily deleted entries are not counted)
+# timers (seconds)
+#   pop, push : open list operations
+#   expand : move generation and creation of the pushed children, without the heuristic
+#   heuristic : heuristic calls (full computations and deltas, only for the children that are not duplicates)
+#   dedup : lookups and updates of the closed table
+#
+# the timers add a few perf_counter calls per state so an instrumented search is
+#   slower than a plain one, timers = False keeps only the counters
+
+COUNTERS = ['expanded', 'generated', 'duplicates', 'reopenings', 'pushes', 'pops']
+PHASES = ['pop', 'expand', 'heuristic', 'dedup', 'push']
+
+# can be raised by a progress callback to stop the search
+class SearchCancelled(Exception):
+    pass
+
+# progress is called every progress_interval expansions with a dictionary
+#   {counters, timers, elapsed, f, frontier_size}, it can raise (e.g. SearchCancelled)
+#   to stop the search, the exception is passed on to the caller of do_search
+# profile = True runs the search under cProfile (see profile_report), a profiler
+#   object with enable and disable methods (e.g. a sampling profiler) can be given instead
+class SearchStats:
+    def __init__(self, timers = True, progress = None, progress_interval = 10000, profile = False):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timers = dict.fromkeys(PHASES, 0.0) if timers else None
+        self.progress = progress
+        self.progress_interval = progress_interval
+        if profile is True:
+            profile = cProfile.Profile()
+        self.profiler = profile or None
+        self.start = None
+        self.elapsed = 0.0
+
+    def begin(self):
+        self.start = time.perf_counter()
+        if self.profiler:
+            self.profiler.enable()
+
+    def end(self):
+        if self.profiler:
+            self.profiler.disable()
+        self.elapsed += time.perf_counter() - self.start
+
+    # wraps a heuristic function so its calls and deltas are timed
+    def timed_heuristic(self, heuristic_function):
+        if heuristic_function is None or self.timers is None:
+            return heuristic_function
+        return TimedHeuristic(heuristic_function, self.timers)
+
+    def report_progress(self, f, frontier_size):
+        self.progress({
+            'counters' : dict(self.counters),
+            'timers' : dict(self.timers) if self.timers is not None else None,
+            'elapsed' : time.perf_counter() - self.start,
+            'f' : f,
+            'frontier_size' : frontier_size,
+        })
+
+    def as_dict(self):
+        return {
+            'counters' : dict(self.counters),
+            'timers' : dict(self.timers) if self.timers is not None else None,
+            'elapsed' : self.elapsed,
+        }
+
+    # text report of the cProfile run, the limit functions with the largest sort value
+    def profile_report(self, sort = 'cumulative', limit = 20):
+        if not isinstance(self.profiler, cProfile.Profile):
+            return ''
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream = out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+# heuristic function that adds the time of its calls to timers['heuristic']
+#   the searches find the delta of the wrapped function through the delta attribute
+class TimedHeuristic:
+    def __init__(self, heuristic_function, timers):
+        self.heuristic_function = heuristic_function
+        self.timers = timers
+        if hasattr(heuristic_function, 'delta'):
+            self.delta = self.timed_delta
+
+    def __call__(self, state):
+        start = time.perf_counter()
+        res = self.heuristic_function(state)
+        self.timers['heuristic'] += time.perf_counter() - start
+        return res
+
+    def timed_delta(self, spec, tile, from_index, to_index):
+        start = time.perf_counter()
+        res = self.heuristic_function.delta(spec, tile, from_index, to_index)
+        self.timers['heuristic'] += time.perf_counter() - start
+        return res
+
+# sums the stats of several searches (results of SearchStats.as_dict)
+def merge_stats(stats_list):
+    res = {'counters' : dict.fromkeys(COUNTERS, 0), 'timers' : dict.fromkeys(PHASES, 0.0), 'elapsed' : 0.0}
+    for stats in stats_list:
+        for name, value in stats['counters'].items():
+            res['counters'][name] += value
+        for name, value in (stats['timers'] or {}).items():
+            res['timers'][name] += value
+        res['elapsed'] += stats['elapsed']
+    return res
@@ -0,0 +1,47 @@
+import heapq
+
+# single threaded open list (frontier) for the best first searches
+# a binary heap of (f, h, -counter, state) tuples
+#   states are ordered on f, ties are broken on the smaller h and then on the
+#   most recently pushed state (LIFO), so State itself doesnt need to be comparable
+#
+# lazy deletion: when a cheaper path to a state that is already queued is pushed,
+#   the old entry is left in the heap and skipped when it is popped
+#   (queued keeps the cost of the only live entry of every packed board)
+class OpenList:
+    def __init__(self, lazy_deletion = True):
+        self.heap = []
+        self.counter = 0
+        self.lazy_deletion = lazy_deletion
+        self.queued = {}
+        self.stale = 0
+
+    # number of live (not lazily deleted) states in the open list
+    def __len__(self):
+        return len(self.heap) - self.stale
+
+    # pushes a state with priority f
+    # returns False if the same board is already queued with a cost <= state.cost
+    def push(self, state, f):
+        if self.lazy_deletion:
+            queued_cost = self.queued.get(state.key)
+            if queued_cost is not None:
+                if queued_cost <= state.cost:
+                    return False
+                self.stale += 1
+            self.queued[state.key] = state.cost
+
+        self.counter += 1
+        heapq.heappush(self.heap, (f, state.heuristic, -self.counter, state))
+        return True
+
+    # pops the state with the smallest priority, returns (f, state)
+    def pop(self):
+        while True:
+            f, h, counter, state = heapq.heappop(self.heap)
+            if not self.lazy_deletion:
+                return f, state
+            if self.queued.get(state.key) == state.cost:
+                del self.queued[state.key]
+                return f, state
+            self.stale -= 1
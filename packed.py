@@ -0,0 +1,41 @@
+# packed board encoding for the n puzzle
+# a board is stored as a single integer instead of a list
+#   the tile at index i of the one dimensional list lives in the bits
+#   [i * bits, (i + 1) * bits) of the integer
+#   bits = 4 (one nibble per tile) for boards of up to 16 tiles (8 and 15 puzzle)
+#   larger boards (24 puzzle ...) use wider fields in the same integer
+#
+# since the blank is 0, moving a tile into the blank is just a subtraction and
+#   an addition of the tile value shifted to the right places
+
+# number of bits used by one tile for a board with size tiles
+def tile_bits(size):
+    return max(4, (size - 1).bit_length())
+
+# packs a list of tiles into an integer
+def pack(puz):
+    bits = tile_bits(len(puz))
+    res = 0
+    for index in range(len(puz) - 1, -1, -1):
+        res = (res << bits) | puz[index]
+    return res
+
+# unpacks an integer into the list of tiles of a board with size tiles
+def unpack(key, size):
+    bits = tile_bits(size)
+    mask = (1 << bits) - 1
+    res = []
+    for index in range(size):
+        res.append(key & mask)
+        key >>= bits
+    return res
+
+# returns the value of the tile at index of a packed board
+def tile_at(key, index, bits):
+    return (key >> (index * bits)) & ((1 << bits) - 1)
+
+# moves the tile at tile_index into the blank at blank_index
+# returns the new packed board (the blank ends up at tile_index)
+def move(key, blank_index, tile_index, bits):
+    tile = (key >> (tile_index * bits)) & ((1 << bits) - 1)
+    return key - (tile << (tile_index * bits)) + (tile << (blank_index * bits))
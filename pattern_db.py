@@ -0,0 +1,216 @@
+import os
+import sys
+import mmap
+from collections import deque
+from puzzle_globals import Globals
+from atomic_file import atomic_open
+from puzzle_spec import get_default_spec
+from ranking import rank_positions, unrank_positions, get_pattern_size
+from symmetry import is_symmetric, reflect_positions, reflect_pattern
+
+# disjoint additive pattern databases for the n puzzle
+#
+# the tiles are split into disjoint groups (patterns), for each pattern a
+#   database stores the minimum number of moves of the pattern tiles needed to
+#   bring them to their goal positions (moves of the other tiles are free)
+#   since only the moves of the pattern tiles are counted, the values of the
+#   databases of all the groups can be added and the sum is still admissible
+#
+# each database is built once with a retrograde breadth first search from the
+#   goal and written to a file with one byte per placement of the pattern tiles,
+#   the file is then memory mapped so every process that uses it shares one copy
+#
+# on a board with a diagonal symmetry (see symmetry.py) the database of a pattern also
+#   gives the costs of its mirror pattern (the tiles renamed by the reflection) on the
+#   reflected boards, so a pattern and its mirror share one file, stored under the
+#   smaller of the two (sorted) patterns, and partitions made of mirror pairs (the
+#   -mirror ones) only build about half of their tables
+#   the default partitions arent mirror pairs: their larger patterns give much better
+#   values (50 random 8 puzzles: 2596 states evaluated by A* with 4-4, 17518 with
+#   3-3-2-mirror), so they only use the reflection in the lookup below
+# the heuristic also looks up the reflection of the board and takes the larger of the
+#   two sums (both are admissible), which only helps partitions that arent their own mirror
+
+# partitions of the tiles for the default goals (tile t at index t - 1)
+#   the build searches over (placement, blank) pairs with one byte each, so patterns
+#   of more than 6 tiles of the 15 puzzle dont fit in memory (8 tiles: 8 GB)
+PARTITIONS = {
+    '4-4' : [[1,2,3,4],[5,6,7,8]],
+    '5-5-5' : [[1,2,3,5,6],[4,7,8,11,12],[9,10,13,14,15]],
+    '6-6-3' : [[1,2,5,6,9,13],[3,4,7,8,11,12],[10,14,15]],
+    # a pattern, its mirror and a pattern of the tiles on the diagonal
+    '3-3-2-mirror' : [[2,3,6],[4,7,8],[1,5]],
+    '6-6-3-mirror' : [[2,3,4,7,8,12],[5,9,10,13,14,15],[1,6,11]],
+}
+
+# default partition for each board size
+DEFAULT_PARTITIONS = {9 : '4-4', 16 : '6-6-3'}
+
+# value of a placement that was never reached in the database
+UNREACHED = 255
+
+PDB_MAGIC = b'NPDB'
+
+# does a 0-1 breadth first search from the goal of spec over (pattern positions, blank)
+#   moving the blank over a pattern tile costs 1, over any other tile it costs 0
+# returns a bytearray with the cost of every placement of the pattern tiles
+def build_pattern_db(pattern, spec):
+    size = spec.size
+    k = len(pattern)
+    neighbours = spec.move_table
+
+    n_placements = get_pattern_size(k, size)
+    # cost of every (placement, blank) pair, indexed by placement * size + blank
+    costs = bytearray([UNREACHED]) * (n_placements * size)
+
+    start_positions = [spec.goal_index[tile] for tile in pattern]
+    start = rank_positions(start_positions, size) * size + spec.goal_index[0]
+    costs[start] = 0
+    queue = deque([start])
+
+    while queue:
+        current = queue.popleft()
+        placement, blank = divmod(current, size)
+        cost = costs[current]
+        positions = unrank_positions(placement, k, size)
+
+        for cell in neighbours[blank]:
+            if cell in positions:
+                # moves a pattern tile into the blank
+                moved = list(positions)
+                moved[positions.index(cell)] = blank
+                child = rank_positions(moved, size) * size + cell
+                if cost + 1 < costs[child]:
+                    costs[child] = cost + 1
+                    queue.append(child)
+            else:
+                child = placement * size + cell
+                if cost < costs[child]:
+                    costs[child] = cost
+                    queue.appendleft(child)
+
+    res = bytearray(n_placements)
+    for placement in range(n_placements):
+        res[placement] = min(costs[placement * size : (placement + 1) * size])
+    return res
+
+# file of the database of a pattern for a spec
+def get_pattern_db_path(pattern, spec, directory = None):
+    directory = directory or Globals.TABLES_DIR
+    name = 'pdb_%dx%d_%s_%s.bin' % (spec.rows, spec.cols, '-'.join(str(tile) for tile in spec.goal), '-'.join(str(tile) for tile in pattern))
+    return os.path.join(directory, name)
+
+def get_pattern_db_header(pattern, spec):
+    return PDB_MAGIC + bytes([spec.rows, spec.cols, len(pattern)]) + bytes(pattern)
+
+# file layout: magic, rows, cols, pattern size, the pattern tiles, one byte per placement
+def write_pattern_db(path, pattern, spec, table):
+    with atomic_open(path) as f:
+        f.write(get_pattern_db_header(pattern, spec))
+        f.write(table)
+
+# memory maps a database file, returns (mmap, offset of the first placement)
+def load_pattern_db(path, pattern, spec):
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    header = get_pattern_db_header(pattern, spec)
+    if data[:len(header)] != header or len(data) != len(header) + get_pattern_size(len(pattern), spec.size):
+        data.close()
+        raise ValueError('%s is not a pattern database for pattern %s' % (path, pattern))
+    return data, len(header)
+
+# (pattern whose database is stored, True if it is the mirror of pattern)
+def get_stored_pattern(pattern, spec):
+    if not is_symmetric(spec):
+        return list(pattern), False
+    mirror = sorted(reflect_pattern(pattern, spec))
+    if mirror < sorted(pattern):
+        return mirror, True
+    return list(pattern), False
+
+# builds and saves the databases of a partition that are not in directory yet
+#   (the build step, a 6 tile pattern of the 15 puzzle takes a long time), returns
+#   the list of the files built
+def build_pattern_dbs(partition, spec = None, directory = None, verbose = False):
+    spec = spec or get_default_spec()
+    res = []
+    for pattern in partition:
+        stored = get_stored_pattern(pattern, spec)[0]
+        path = get_pattern_db_path(stored, spec, directory)
+        if path in res or os.path.exists(path):
+            continue
+        if verbose:
+            print('building', path)
+        write_pattern_db(path, stored, spec, build_pattern_db(stored, spec))
+        res.append(path)
+    return res
+
+# disjoint additive pattern database heuristic, used as a heuristic_function:
+#   State(puz, 0, None, PatternDatabaseHeuristic(PARTITIONS['6-6-3'], spec), spec = spec)
+# spec is the PuzzleSpec the databases are built for (default: the spec of the goal
+#   in puzzle_globals.py), the databases are loaded from directory
+# with build = True missing databases are built and saved first, with build = False
+#   (worker processes, see get_heuristic in algorithms.py) they raise FileNotFoundError
+#   and have to be built with build_pattern_dbs or py pattern_db.py first
+# reflect = True takes the larger of the values of the board and of its reflection
+#   (when the spec has a diagonal symmetry)
+class PatternDatabaseHeuristic:
+    def __init__(self, partition, spec = None, directory = None, reflect = True, build = True):
+        self.spec = spec or get_default_spec()
+        self.partition = [list(pattern) for pattern in partition]
+        # (stored pattern, mirrored, data, offset) of every pattern
+        self.tables = []
+        self.symmetric = is_symmetric(self.spec)
+
+        loaded = {}
+        for pattern in self.partition:
+            stored, mirrored = get_stored_pattern(pattern, self.spec)
+            path = get_pattern_db_path(stored, self.spec, directory)
+            if not path in loaded:
+                if not os.path.exists(path):
+                    if not build:
+                        raise FileNotFoundError('pattern database %s is missing, build it first (py pattern_db.py)' % path)
+                    write_pattern_db(path, stored, self.spec, build_pattern_db(stored, self.spec))
+                loaded[path] = load_pattern_db(path, stored, self.spec)
+            self.tables.append((stored, mirrored) + loaded[path])
+
+        # the reflection of a board gives the same sum when the partition is its own mirror
+        patterns = set(frozenset(pattern) for pattern in self.partition)
+        self.reflect = reflect and self.symmetric and \
+            patterns != set(frozenset(reflect_pattern(pattern, self.spec)) for pattern in self.partition)
+        self.uses_reflection = self.reflect or any(table[1] for table in self.tables)
+
+    # sum of the databases for the board with the tile positions positions,
+    #   reflected are the positions of its reflection (used by the mirrored patterns)
+    def lookup(self, positions, reflected):
+        size = self.spec.size
+        res = 0
+        for stored, mirrored, data, offset in self.tables:
+            source = reflected if mirrored else positions
+            res += data[offset + rank_positions([source[tile] for tile in stored], size)]
+        return res
+
+    def __call__(self, state):
+        if state.spec.goal_key != self.spec.goal_key:
+            raise ValueError('pattern database built for a different goal')
+        puz = state.puz
+        size = self.spec.size
+        positions = [0] * size
+        for index in range(size):
+            positions[puz[index]] = index
+
+        reflected = reflect_positions(positions, self.spec) if self.uses_reflection else None
+        res = self.lookup(positions, reflected)
+        if self.reflect:
+            res = max(res, self.lookup(reflected, positions))
+        return res
+
+# precomputes the databases of a partition for the goal in puzzle_globals.py
+#   py pattern_db.py <partition name>
+def main():
+    spec = get_default_spec()
+    name = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PARTITIONS[spec.size]
+    build_pattern_dbs(PARTITIONS[name], spec, verbose = True)
+
+if __name__ == '__main__':
+    main()
@@ -1,121 +1,18 @@
 import sys
-import random
-import plotly
-import plotly.graph_objs as go
 
-from plotly import tools
 from state import *
-from queue import PriorityQueue
+from heuristics import *
+from ida_star import do_ida_search
 from puzzle_globals import Globals
-from tqdm import tqdm
-
-# n puzzle misplaced tiles heuristic
-# returns the sum of all the misplaced tiles in the state compared to goal in
-#   puzzle_globals.py
-def h_misplaced_tiles(state):
-    res = 0
-    for tiles_index in range(len(state.puz)):
-        if state.puz[tiles_index] == 0: continue
-        if state.puz[tiles_index] != Globals.GOAL[tiles_index]:
-            res += 1
-    return res
-
-# n puzzle manhattan distance heuristic
-# returns the sum of manhattan distance of all the tiles in the state compared to goal in
-#   puzzle_globals.py
-def h_manhattan_distance(state):
-    res = 0
-    total_rows = total_cols = int(math.sqrt(len(state.puz)))
-    for state_index in range(len(state.puz)):
-        tile_value = state.puz[state_index]
-        if tile_value != 0:
-            state_row = state_index // total_cols
-            state_col = state_index % total_cols
-
-            goal_index = Globals.GOAL.index(tile_value)
-            goal_row = goal_index // total_cols
-            goal_col = goal_index % total_cols
-
-            res = res + (abs(goal_row - state_row) + abs(goal_col - state_col))
-    return res
-
-# function to do a search from an initial state and
-# returns a dictionary {solution : [solution states],
-#                        max_frontier_size : int, states_eval : int}
-def do_search(init_state,ignore_dups = True):
-    res = {
-        'solutions' : [],
-        'max_frontier_size' : 0,
-        'states_evaluated' : 0,
-    }
-    frontier = PriorityQueue()
-    frontier.put(init_state)
-
-    duplicates = {str(init_state.puz):1}
-
-    while(not frontier.empty()):
-        curr_state = frontier.get()
-
-        res['states_evaluated'] += 1
-        if curr_state.is_goal():
-            res['solutions'].append(curr_state)
-            return res
-
-        else:
-            children = curr_state.expand()
-
-            for child in children:
-                if not str(child.puz) in duplicates and ignore_dups:
-                    frontier.put(child)
-                    duplicates[str(child.puz)] = 1
-                elif not ignore_dups:
-                    frontier.put(child)
-
-            res['max_frontier_size'] = max(res['max_frontier_size'],frontier.qsize())
-    return res
-
-# creates a random solvable config of the puzzle
-# inputs : the goal array
-def shuffle_puzzle(goal):
-    n_moves = random.randint(1,100)
-    res = list(goal)
-    for n_moves in range(n_moves):
-        blank_index = res.index(0)
-        # do random move
-        tile_index = random.choice(get_movable_tiles(res))
-        res[blank_index], res[tile_index] = res[tile_index], res[blank_index]
-
-    return res
+from instrumentation import SearchStats, merge_stats, PHASES
+# the solver core, imported from here by older scripts
+from search import get_priority, do_search, do_instrumented_search, get_solution_path, shuffle_puzzle, get_movable_tiles
 
-
-def get_movable_tiles(puzzle):
-    movable_tiles = []
-    total_rows = total_cols = int(math.sqrt(len(puzzle)))
-    # looks for the empty space
-    # this will be used to deptermine the tiles that can be moved and where (index of 0)
-    blank_index = puzzle.index(0)
-    # calculate the row and col on a '2D' list from a 1D list
-    blank_row = blank_index // total_cols
-    blank_col = blank_index % total_cols
-
-    # list of movable tiles (around the blank tile - top , left, bottom, right)
-    # each item in the list is the ordered pair of row and col for each tile
-    tiles = [   [blank_row - 1, blank_col], # top
-                [blank_row, blank_col - 1], # left
-                [blank_row + 1, blank_col], # bottom
-                [blank_row, blank_col + 1]] # right
-
-    for tile in tiles:
-        # check if the movable tile is inside the grid
-        if  tile[0] >= 0 and tile[0] < total_rows and \
-            tile[1] >= 0 and tile[1] < total_cols:
-            # calculate actual index of the tile in a one dimensional list
-            actual_index = tile[0] * total_cols + tile[1]
-            movable_tiles.append(actual_index)
-
-    return movable_tiles
+# plots of the searches, plotly and tqdm are only imported when they are used so
+#   importing this module for the solver core stays cheap
 
 def plot(x_val, y_val, line_name):
+    import plotly.graph_objs as go
     trace = go.Scatter(
         x = x_val,
         y = y_val,
@@ -128,7 +25,17 @@ def plot(x_val, y_val, line_name):
 def get_key(l):
     return l[0]
 
-def get_plotdata(name, data_set, heuristic_function=None, heuristic_only = False):
+# search_function is the search engine used to solve each sample (do_search or do_ida_search)
+#   the last solution of a search is its best one (anytime searches append every improvement)
+# results is an optional list of already solved samples (see solve_batch in batch.py),
+#   one dictionary {cost, max_frontier_size, states_evaluated} per sample in data_set
+# spec is the PuzzleSpec of the samples (default: the spec of the goal in puzzle_globals.py)
+# instrument = True solves the samples with a SearchStats (only for do_search), when the
+#   results have stats res['phase_time_plot'] has the total time of each search phase
+# options are extra arguments of search_function (the options of an entry of ALGORITHMS
+#   in algorithms.py, e.g. {'weight' : 2} for weighted A*)
+def get_plotdata(name, data_set, heuristic_function=None, heuristic_only = False, search_function = do_search, results = None, spec = None, instrument = False, options = None):
+    options = options or {}
     res = {}
     solution_depth_array = []
     max_frontier_size_array = []
@@ -138,13 +45,30 @@ def get_plotdata(name, data_set, heuristic_function=None, heuristic_only = False
     complexity_points = []
     optimality_points = []
 
-    for x in tqdm(range(len(data_set)), desc = name):
-        random_initial_config = data_set[x]
-
-        sol = do_search(State(random_initial_config, 0, None, heuristic_function,heuristic_only))
-
-        complexity_points.append([ sol['solutions'][0].cost, sol['max_frontier_size'], sol['states_evaluated'] ])
-        optimality_points.append([ x, sol['solutions'][0].cost ])
+    if results is None:
+        from tqdm import tqdm
+        results = []
+        for x in tqdm(range(len(data_set)), desc = name):
+            random_initial_config = data_set[x]
+
+            init_state = State(random_initial_config, 0, None, heuristic_function,heuristic_only, spec = spec)
+            if instrument and search_function is do_search:
+                sol = do_search(init_state, stats = SearchStats(), **options)
+            else:
+                sol = search_function(init_state, **options)
+            if not sol['solutions']:
+                # an anytime search out of time before its first solution
+                results.append({'timed_out' : True})
+                continue
+            results.append({'cost' : sol['solutions'][-1].cost, 'max_frontier_size' : sol['max_frontier_size'], 'states_evaluated' : sol['states_evaluated']})
+            if 'stats' in sol:
+                results[-1]['stats'] = sol['stats']
+
+    for x in range(len(results)):
+        # samples that timed out or ran out of nodes have no solution
+        if results[x].get('timed_out') or results[x].get('node_limit'): continue
+        complexity_points.append([ results[x]['cost'], results[x]['max_frontier_size'], results[x]['states_evaluated'] ])
+        optimality_points.append([ x, results[x]['cost'] ])
 
     complexity_points = sorted(complexity_points, key = get_key)
 
@@ -156,36 +80,83 @@ def get_plotdata(name, data_set, heuristic_function=None, heuristic_only = False
     res['time_complexity_plot'] = plot(solution_depth_array,num_of_nodes_visited_array,name) # for time complexity graph
     res['optimality_plot'] = plot([ p[0] for p in optimality_points ],[ p[1] for p in optimality_points ],name) # for optimality graph
 
+    stats = [result['stats'] for result in results if 'stats' in result]
+    if stats:
+        import plotly.graph_objs as go
+        timers = merge_stats(stats)['timers']
+        res['phase_time_plot'] = go.Bar(x = PHASES, y = [timers[phase] for phase in PHASES], name = name) # for search phases graph
+
     return res
 
+# space and time complexity plots of every algorithm in a results store (see results_store.py),
+#   the mean frontier size and states evaluated at each solution depth over all the runs
+#   in the store, computed by streaming over its columns
+# returns a list of {'space_complexity_plot', 'time_complexity_plot'}, one per algorithm
+#   rows, cols keep only the boards of that shape
+def get_store_plotdata(store, names = None, rows = None, cols = None):
+    from results_store import get_complexity_curves
+    res = []
+    for algorithm, curve in sorted(get_complexity_curves(store, rows, cols).items()):
+        name = (names or {}).get(algorithm, algorithm)
+        res.append({
+            'space_complexity_plot' : plot(curve['cost'], curve['max_frontier_size'], name),
+            'time_complexity_plot' : plot(curve['cost'], curve['states_evaluated'], name),
+        })
+    return res
+
+# py puzzle.py <sample size> [workers] [cache file] [--stats] [--store directory] [--exact-heuristic]
+#   with workers > 1 the samples are solved in parallel by that many processes
+#   with a cache file (see solution_cache.py) samples solved in earlier runs are not searched again,
+#     with --exact-heuristic the optimal costs in the cache are also used as heuristic values
+#   with --stats the searches are instrumented (see instrumentation.py) and the time
+#     spent in each search phase is plotted
+#   with --store the results are appended to a results store (see results_store.py) and
+#     the complexity plots are built from all the runs in the store
 def main():
-    sample_size = int(sys.argv[1])
+    import plotly
+    import plotly.graph_objs as go
+    from algorithms import ALGORITHMS, get_algorithm_names, get_heuristic
+    from batch import solve_batch
+
+    instrument = '--stats' in sys.argv
+    exact_heuristic = '--exact-heuristic' in sys.argv
+    args = [arg for arg in sys.argv[1:] if not arg in ('--stats', '--exact-heuristic')]
+    store = None
+    if '--store' in args:
+        from results_store import ResultStore
+        position = args.index('--store')
+        store = ResultStore(args[position + 1])
+        del args[position : position + 2]
+    sample_size = int(args[0])
+    workers = int(args[1]) if len(args) > 1 else 1
+    cache_path = args[2] if len(args) > 2 else None
 
     samples = [shuffle_puzzle(Globals.GOAL) for i in range(sample_size)]
-
-    ucs_plotdata = get_plotdata(name = "UCS/BFS",data_set = samples)
-    greedy_mt_plotdata = get_plotdata(name = "Greedy Best First Search - Misplaced Tiles Heuristic" , data_set = samples, heuristic_function = h_misplaced_tiles, heuristic_only = True)
-    greedy_md_plotdata = get_plotdata(name = "Greedy Best First Search - Manhattan Distance Heuristic", data_set = samples, heuristic_function = h_manhattan_distance, heuristic_only = True)
-    a_star_md_plotdata = get_plotdata(name = "A* - Manhattan Distance Heuristic", data_set = samples, heuristic_function = h_manhattan_distance)
-    a_star_mt_plotdata = get_plotdata(name = "A* - Misplaced Tiles Heuristic", data_set = samples, heuristic_function = h_misplaced_tiles)
-
-    space_complexity_data = [ucs_plotdata['space_complexity_plot'], \
-        greedy_mt_plotdata['space_complexity_plot'], \
-        greedy_md_plotdata['space_complexity_plot'], \
-        a_star_mt_plotdata['space_complexity_plot'], \
-        a_star_md_plotdata['space_complexity_plot'] ]
-
-    time_complexity_data = [ucs_plotdata['time_complexity_plot'], \
-        greedy_mt_plotdata['time_complexity_plot'], \
-        greedy_md_plotdata['time_complexity_plot'], \
-        a_star_mt_plotdata['time_complexity_plot'], \
-        a_star_md_plotdata['time_complexity_plot'] ]
-
-    optimality_data = [ucs_plotdata['optimality_plot'], \
-        greedy_mt_plotdata['optimality_plot'], \
-        greedy_md_plotdata['optimality_plot'], \
-        a_star_mt_plotdata['optimality_plot'], \
-        a_star_md_plotdata['optimality_plot'] ]
+    algorithm_names = get_algorithm_names()
+
+    plotdata = []
+    # the cache and the store are used through the batch solver, even with a single worker
+    if workers > 1 or cache_path or store is not None:
+        jobs = [(sample, algorithm) for algorithm in algorithm_names for sample in samples]
+        results = solve_batch(jobs, workers = workers, cache_path = cache_path, instrument = instrument, exact_heuristic = exact_heuristic)
+        if store is not None:
+            store.append(get_default_spec(), jobs, results)
+        for i in range(len(algorithm_names)):
+            algorithm_results = results[i * sample_size : (i + 1) * sample_size]
+            plotdata.append(get_plotdata(name = ALGORITHMS[algorithm_names[i]]['name'], data_set = samples, results = algorithm_results))
+    else:
+        for algorithm in algorithm_names:
+            entry = ALGORITHMS[algorithm]
+            plotdata.append(get_plotdata(name = entry['name'], data_set = samples, heuristic_function = get_heuristic(entry['heuristic']), heuristic_only = entry['heuristic_only'], search_function = entry['search'], instrument = instrument, options = entry.get('options')))
+
+    complexity_plotdata = plotdata
+    if store is not None:
+        spec = get_default_spec()
+        names = {algorithm : ALGORITHMS[algorithm]['name'] for algorithm in ALGORITHMS}
+        complexity_plotdata = get_store_plotdata(store, names, spec.rows, spec.cols)
+    space_complexity_data = [p['space_complexity_plot'] for p in complexity_plotdata]
+    time_complexity_data = [p['time_complexity_plot'] for p in complexity_plotdata]
+    optimality_data = [p['optimality_plot'] for p in plotdata]
 
     plotly.offline.plot({
     "data": space_complexity_data,
@@ -202,5 +173,12 @@ def main():
     "layout": go.Layout(title="Optimality", xaxis={'title':"Instances"}, yaxis={'title':"Solution Depth"})
     }, auto_open=True, filename='optimality.html')
 
+    phase_time_data = [p['phase_time_plot'] for p in plotdata if 'phase_time_plot' in p]
+    if phase_time_data:
+        plotly.offline.plot({
+        "data": phase_time_data,
+        "layout": go.Layout(title="Search Phases", xaxis={'title':"Phase"}, yaxis={'title':"Seconds"}, barmode='group')
+        }, auto_open=True, filename='search-phases.html')
+
 if __name__ == '__main__':
     main()
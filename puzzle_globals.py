@@ -1,3 +1,6 @@
+import os
 
 class Globals():
     GOAL = [1,2,3,4,5,6,7,8,0]
+    # directory where precomputed tables (pattern databases ...) are saved
+    TABLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
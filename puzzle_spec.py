@@ -0,0 +1,103 @@
+import math
+from packed import pack, tile_bits
+from puzzle_globals import Globals
+
+# description of an n puzzle: the shape of the board and the goal layout
+#   rows, cols are the number of rows and columns of the board (not always square)
+#   goal is the goal as a one dimensional list (default: 1 ... rows * cols - 1, 0)
+#
+# everything that only depends on the shape and the goal is computed once here so the
+#   searches and heuristics dont recompute the geometry for every node
+#   move_table[blank] is the list of tile indices around a blank at index blank
+#     (top, left, bottom, right)
+#   successors[blank][parent_blank] is the tuple of move_table[blank] without
+#     parent_blank (moving that tile back gives the parent again), for every neighbour
+#     parent_blank of blank, successors[blank][None] is for a state without a parent,
+#     so the searches dont filter the moves per node
+#   goal_index[tile] is the index of tile in the goal
+#   goal_row[tile], goal_col[tile] are the row and col of tile in the goal
+#   distance[tile][index] is the manhattan distance of tile at index to its goal index
+#   tables is a cache for the tables that heuristics build per spec (see heuristics.py)
+class PuzzleSpec:
+    def __init__(self, rows, cols, goal = None):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.goal = list(goal) if goal else list(range(1, self.size)) + [0]
+        if len(self.goal) != self.size:
+            raise ValueError('goal has %d tiles, a %dx%d board has %d' % (len(self.goal), rows, cols, self.size))
+
+        self.bits = tile_bits(self.size)
+        self.goal_key = pack(self.goal)
+        self.goal_index = [0] * self.size
+        for index in range(self.size):
+            self.goal_index[self.goal[index]] = index
+        self.goal_row = [self.goal_index[tile] // cols for tile in range(self.size)]
+        self.goal_col = [self.goal_index[tile] % cols for tile in range(self.size)]
+
+        self.move_table = []
+        for blank_index in range(self.size):
+            # calculate the row and col on a '2D' list from a 1D list
+            blank_row = blank_index // cols
+            blank_col = blank_index % cols
+
+            # list of movable tiles (around the blank tile - top , left, bottom, right)
+            # each item in the list is the ordered pair of row and col for each tile
+            movable_tiles =     [[blank_row - 1, blank_col], # top
+                                [blank_row, blank_col - 1], # left
+                                [blank_row + 1, blank_col], # bottom
+                                [blank_row, blank_col + 1]] # right
+
+            tiles = []
+            for tile in movable_tiles:
+                # check if the movable tile is inside the grid
+                if  tile[0] >= 0 and tile[0] < rows and \
+                    tile[1] >= 0 and tile[1] < cols:
+                    # calculate actual index of the tile in a one dimensional list
+                    tiles.append(tile[0] * cols + tile[1])
+            self.move_table.append(tiles)
+
+        self.successors = []
+        for blank_index in range(self.size):
+            tiles = self.move_table[blank_index]
+            moves = {None : tuple(tiles)}
+            for parent_index in tiles:
+                moves[parent_index] = tuple(tile for tile in tiles if tile != parent_index)
+            self.successors.append(moves)
+
+        self.distance = []
+        for tile in range(self.size):
+            self.distance.append([abs(self.goal_row[tile] - index // cols) + abs(self.goal_col[tile] - index % cols)
+                                  for index in range(self.size)])
+
+        self.tables = {}
+
+    # the cached heuristic tables are not sent to other processes, they are rebuilt there
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['tables'] = {}
+        return state
+
+    def __repr__(self):
+        return 'PuzzleSpec(%d, %d, %s)' % (self.rows, self.cols, self.goal)
+
+# cache of the specs made by get_spec
+_specs = {}
+
+# returns the spec for a goal list, cols is the number of columns (default: square board)
+def get_spec(goal, cols = None):
+    cols = cols or int(math.sqrt(len(goal)))
+    cache_key = (tuple(goal), cols)
+    if not cache_key in _specs:
+        _specs[cache_key] = PuzzleSpec(len(goal) // cols, cols, goal)
+    return _specs[cache_key]
+
+# cache of the spec of Globals.GOAL, refreshed whenever Globals.GOAL is replaced
+_default_spec = [None, None]
+
+# returns the spec of the square board with the goal in puzzle_globals.py
+def get_default_spec():
+    if _default_spec[0] is not Globals.GOAL:
+        _default_spec[1] = get_spec(Globals.GOAL)
+        _default_spec[0] = Globals.GOAL
+    return _default_spec[1]
@@ -0,0 +1,33 @@
+import math
+
+# permutation ranking, maps permutations (or placements of k items) of n cells to
+#   consecutive integers so tables can be indexed by board (see pattern_db.py and
+#   distance_table.py)
+
+# lehmer code rank of the positions of k tiles on a board of size cells
+#   rank is in [0, size! / (size - k)!), ranks keep the lexicographic order of the positions
+def rank_positions(positions, size):
+    res = 0
+    for i in range(len(positions)):
+        smaller = positions[i]
+        for j in range(i):
+            if positions[j] < positions[i]:
+                smaller -= 1
+        res = res * (size - i) + smaller
+    return res
+
+# inverse of rank_positions
+def unrank_positions(rank, k, size):
+    digits = [0] * k
+    for i in range(k - 1, -1, -1):
+        digits[i] = rank % (size - i)
+        rank //= size - i
+
+    free = list(range(size))
+    res = []
+    for digit in digits:
+        res.append(free.pop(digit))
+    return res
+
+def get_pattern_size(k, size):
+    return math.factorial(size) // math.factorial(size - k)
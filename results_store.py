@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import array
+import hashlib
+from packed import pack
+from atomic_file import atomic_open
+
+# append only columnar store of search results, one row per (instance, algorithm) job
+#   (jobs that timed out or ran out of nodes included, see status)
+#
+# a store is a directory with one raw file per column and a schema.json
+#   every column file is the plain array of its values (written with the array module,
+#   little endian), so it can be memory mapped as a numpy array of the dtype in the
+#   schema without reading it, or read in chunks without numpy
+#   new rows are appended to the end of every column file, nothing is rewritten, so
+#   runs of different days add up in the same store
+# the number of rows is the length of the shortest column file, a run that was
+#   interrupted while appending leaves longer columns that are cut back on the next open
+# only one process should append to a store at a time (the batch solver returns its
+#   results to the parent process, which appends them)
+# results answered from a solution cache (see solution_cache.py) arent stored, their
+#   stats are the ones of the search that solved them, which isnt a new run
+#
+# columns
+#   timestamp : seconds since the epoch when the row was appended
+#   instance : the packed board (see packed.py), boards that dont fit in 64 bits
+#     (the 24 puzzle) are stored as a 64 bit hash of it
+#   rows, cols : shape of the board
+#   algorithm : index of the algorithm name in schema['algorithms']
+#   status : SOLVED, TIMED_OUT or NODE_LIMIT
+#   cost : cost of the best solution found (-1 without a solution)
+#   max_frontier_size, states_evaluated, time : from the result of the search
+
+# (name, array typecode, numpy dtype)
+COLUMNS = [
+    ('timestamp', 'd', '<f8'),
+    ('instance', 'Q', '<u8'),
+    ('rows', 'B', 'u1'),
+    ('cols', 'B', 'u1'),
+    ('algorithm', 'H', '<u2'),
+    ('status', 'B', 'u1'),
+    ('cost', 'i', '<i4'),
+    ('max_frontier_size', 'q', '<i8'),
+    ('states_evaluated', 'q', '<i8'),
+    ('time', 'd', '<f8'),
+]
+
+SOLVED = 0
+TIMED_OUT = 1
+NODE_LIMIT = 2
+
+SCHEMA_VERSION = 1
+
+# rows read at once by the chunked readers
+CHUNK_ROWS = 1 << 16
+
+# value of the instance column for a board
+def get_instance_key(instance):
+    key = pack(instance)
+    if key.bit_length() <= 64:
+        return key
+    return int.from_bytes(hashlib.blake2b(key.to_bytes((key.bit_length() + 7) // 8, 'little'), digest_size = 8).digest(), 'little')
+
+def get_status(result):
+    if result.get('timed_out'):
+        return TIMED_OUT
+    if result.get('node_limit'):
+        return NODE_LIMIT
+    return SOLVED
+
+# store in directory, created if missing
+#   store = ResultStore('results')
+#   store.append(spec, jobs, solve_batch(jobs))
+#   store.aggregate(['algorithm', 'cost'], ['states_evaluated'])
+class ResultStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok = True)
+        self.schema_path = os.path.join(directory, 'schema.json')
+        if os.path.exists(self.schema_path):
+            with open(self.schema_path) as f:
+                self.schema = json.load(f)
+            if self.schema['version'] != SCHEMA_VERSION:
+                raise ValueError('%s has schema version %s, expected %d' % (directory, self.schema['version'], SCHEMA_VERSION))
+        else:
+            self.schema = {
+                'version' : SCHEMA_VERSION,
+                'columns' : [{'name' : name, 'typecode' : typecode, 'dtype' : dtype} for name, typecode, dtype in COLUMNS],
+                'algorithms' : [],
+            }
+            self.write_schema()
+        self.itemsizes = {column['name'] : array.array(column['typecode']).itemsize for column in self.schema['columns']}
+        self.typecodes = {column['name'] : column['typecode'] for column in self.schema['columns']}
+        self.truncate()
+
+    def get_column_path(self, name):
+        return os.path.join(self.directory, name + '.bin')
+
+    def write_schema(self):
+        with atomic_open(self.schema_path, 'w') as f:
+            json.dump(self.schema, f, indent = 2)
+
+    def __len__(self):
+        lengths = []
+        for name, itemsize in self.itemsizes.items():
+            path = self.get_column_path(name)
+            lengths.append(os.path.getsize(path) // itemsize if os.path.exists(path) else 0)
+        return min(lengths)
+
+    # cuts every column back to the number of complete rows
+    def truncate(self):
+        rows = len(self)
+        for name, itemsize in self.itemsizes.items():
+            path = self.get_column_path(name)
+            if os.path.exists(path) and os.path.getsize(path) != rows * itemsize:
+                os.truncate(path, rows * itemsize)
+
+    # index of an algorithm name in the algorithm column, added to the schema if new
+    def get_algorithm_code(self, algorithm):
+        algorithms = self.schema['algorithms']
+        if not algorithm in algorithms:
+            algorithms.append(algorithm)
+            self.write_schema()
+        return algorithms.index(algorithm)
+
+    def get_algorithm_name(self, code):
+        return self.schema['algorithms'][code]
+
+    # appends one row per result, results[i] is the result of solve_job in batch.py
+    #   for jobs[i] = (instance, algorithm name) on boards of spec
+    #   cached results are skipped
+    def append(self, spec, jobs, results):
+        now = time.time()
+        columns = {name : array.array(typecode) for name, typecode in self.typecodes.items()}
+        for (instance, algorithm), result in zip(jobs, results):
+            if result.get('cached'):
+                continue
+            status = get_status(result)
+            columns['timestamp'].append(now)
+            columns['instance'].append(get_instance_key(instance))
+            columns['rows'].append(spec.rows)
+            columns['cols'].append(spec.cols)
+            columns['algorithm'].append(self.get_algorithm_code(algorithm))
+            columns['status'].append(status)
+            columns['cost'].append(result['cost'] if status == SOLVED else -1)
+            columns['max_frontier_size'].append(result.get('max_frontier_size', 0))
+            columns['states_evaluated'].append(result.get('states_evaluated', 0))
+            columns['time'].append(result.get('time', 0.0))
+
+        for name, values in columns.items():
+            if sys.byteorder == 'big':
+                values.byteswap()
+            with open(self.get_column_path(name), 'ab') as f:
+                values.tofile(f)
+
+    # numpy memory maps of columns (default: all), nothing is read until it is used
+    def memmap(self, names = None):
+        # imported here since the store itself only needs the standard library
+        import numpy as np
+        rows = len(self)
+        res = {}
+        for column in self.schema['columns']:
+            if names is None or column['name'] in names:
+                if rows == 0:
+                    res[column['name']] = np.zeros(0, dtype = column['dtype'])
+                else:
+                    res[column['name']] = np.memmap(self.get_column_path(column['name']), dtype = column['dtype'], mode = 'r', shape = (rows,))
+        return res
+
+    # yields {name : array.array} with chunk_rows rows of the columns names at a time
+    def iter_chunks(self, names, chunk_rows = CHUNK_ROWS):
+        rows = len(self)
+        if rows == 0:
+            return
+        files = {name : open(self.get_column_path(name), 'rb') for name in names}
+        try:
+            for start in range(0, rows, chunk_rows):
+                count = min(chunk_rows, rows - start)
+                chunk = {}
+                for name, f in files.items():
+                    values = array.array(self.typecodes[name])
+                    values.fromfile(f, count)
+                    if sys.byteorder == 'big':
+                        values.byteswap()
+                    chunk[name] = values
+                yield chunk
+        finally:
+            for f in files.values():
+                f.close()
+
+    # streaming group by over the solved rows (status SOLVED)
+    #   keys are the columns of the group key, values the columns that are aggregated
+    #   where is an optional function of a row {name : value} that keeps the rows it is true for
+    # returns {key tuple : {'count' : rows, column : {'sum', 'min', 'max', 'mean'} for every value column}}
+    #   the algorithm column is given as algorithm names
+    def aggregate(self, keys, values, where = None, chunk_rows = CHUNK_ROWS):
+        names = list(dict.fromkeys(list(keys) + list(values) + ['status'] + (list(self.typecodes) if where else [])))
+        groups = {}
+        for chunk in self.iter_chunks(names, chunk_rows):
+            columns = [chunk[name] for name in names]
+            for row in zip(*columns):
+                row = dict(zip(names, row))
+                if row['status'] != SOLVED or (where and not where(row)):
+                    continue
+                key = tuple(self.get_algorithm_name(row[name]) if name == 'algorithm' else row[name] for name in keys)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {'count' : 0}
+                    for name in values:
+                        group[name] = {'sum' : 0, 'min' : row[name], 'max' : row[name]}
+                group['count'] += 1
+                for name in values:
+                    value = row[name]
+                    total = group[name]
+                    total['sum'] += value
+                    if value < total['min']: total['min'] = value
+                    if value > total['max']: total['max'] = value
+
+        for group in groups.values():
+            for name in values:
+                group[name]['mean'] = group[name]['sum'] / group['count']
+        return groups
+
+# mean frontier size, states evaluated and time per solution depth of every algorithm
+#   in a store, over all the solved rows (of the boards with rows x cols if given)
+# returns {algorithm name : {'cost' : [depths], column : [means at each depth]}}
+def get_complexity_curves(store, rows = None, cols = None):
+    where = None
+    if rows is not None:
+        where = lambda row: row['rows'] == rows and row['cols'] == cols
+    groups = store.aggregate(['algorithm', 'cost'], ['max_frontier_size', 'states_evaluated', 'time'], where)
+    res = {}
+    for (algorithm, cost) in sorted(groups):
+        curve = res.setdefault(algorithm, {'cost' : [], 'count' : [], 'max_frontier_size' : [], 'states_evaluated' : [], 'time' : []})
+        curve['cost'].append(cost)
+        curve['count'].append(groups[algorithm, cost]['count'])
+        for name in ('max_frontier_size', 'states_evaluated', 'time'):
+            curve[name].append(groups[algorithm, cost][name]['mean'])
+    return res
+
+# summary of a store, one line per algorithm
+#   py results_store.py <directory>
+def main():
+    store = ResultStore(sys.argv[1])
+    groups = store.aggregate(['algorithm'], ['cost', 'states_evaluated', 'time'])
+    print('%d rows' % len(store))
+    for (algorithm,) in sorted(groups):
+        group = groups[algorithm,]
+        print('%-20s %10d solved  mean cost %7.2f  mean states %12.1f  mean time %9.4fs' % (
+            algorithm, group['count'], group['cost']['mean'], group['states_evaluated']['mean'], group['time']['mean']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import time
+from state import *
+from open_list import OpenList
+from instances import random_solvable_puzzle
+from puzzle_spec import get_spec, get_default_spec
+
+# solver core of the best first searches (UCS, greedy, A* and weighted A*)
+#   this module only needs the standard library so solver processes start quickly,
+#   the plots and progress bars are in puzzle.py
+
+# priority of a state in the open list
+#   greedy best first search (heuristic_only) uses h, A* and UCS use g + h
+#   weighted A* uses g + weight * h, its solutions cost at most weight times the optimal cost
+def get_priority(state, weight = 1):
+    if state.heuristic_only:
+        return state.heuristic
+    return state.cost + weight * state.heuristic
+
+# function to do a search from an initial state and
+# returns a dictionary {solution : [solution states], path : [states from init_state to the goal],
+#                        max_frontier_size : int, states_eval : int,
+#                        states_evaluated_per_layer : {f : int}}
+# stats is an optional SearchStats (see instrumentation.py), with it the search is
+#   counted, timed and profiled and res['stats'] has the measurements
+# weight is the weight of the heuristic in the priority (see get_priority), 1 for A*
+def do_search(init_state,ignore_dups = True, stats = None, weight = 1):
+    if stats is not None:
+        return do_instrumented_search(init_state, ignore_dups, stats, weight)
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+        'states_evaluated_per_layer' : {},
+    }
+    frontier = OpenList(lazy_deletion = ignore_dups)
+    frontier.push(init_state, get_priority(init_state, weight))
+
+    # closed table of every board seen, keyed on the packed board (see closed_entry)
+    stride = init_state.size + 1
+    duplicates = {init_state.key:closed_entry(init_state.cost, None, stride)}
+    per_layer = res['states_evaluated_per_layer']
+
+    # the children are generated from the successor table of the spec (see puzzle_spec.py)
+    #   as packed boards, a State is only made for the children that are pushed
+    spec = init_state.spec
+    bits = spec.bits
+    successors = spec.successors
+    heuristic_function = init_state.heuristic_function
+    heuristic_only = init_state.heuristic_only
+    delta = getattr(heuristic_function, 'delta', None)
+
+    while(len(frontier) > 0):
+        f, curr_state = frontier.pop()
+
+        res['states_evaluated'] += 1
+        per_layer[f] = per_layer.get(f, 0) + 1
+        if curr_state.is_goal():
+            if ignore_dups:
+                res['path'] = get_solution_path(init_state, curr_state, duplicates)
+            res['solutions'].append(curr_state)
+            return res
+
+        else:
+            key, blank, h = curr_state.key, curr_state.blank, curr_state.heuristic
+            cost = curr_state.cost + 1
+            parent_blank = curr_state.parent_blank
+
+            for tile_index in successors[blank][parent_blank]:
+                child_key = move(key, blank, tile_index, bits)
+                if ignore_dups:
+                    # a board is pushed again only if this is a cheaper path to it
+                    known = duplicates.get(child_key)
+                    if known is not None and cost >= closed_cost(known, stride):
+                        continue
+                    duplicates[child_key] = closed_entry(cost, blank, stride)
+                child_h = h + delta(spec, tile_at(key, tile_index, bits), tile_index, blank) if delta else None
+                child = State(child_key, cost, blank, heuristic_function, heuristic_only, tile_index, spec, child_h)
+                frontier.push(child, get_priority(child, weight))
+
+            res['max_frontier_size'] = max(res['max_frontier_size'],len(frontier))
+    return res
+
+# same search as do_search, with every phase counted and timed in stats
+#   kept apart from do_search so the plain search has no instrumentation cost,
+#   tests/test_instrumentation.py checks that both make the same choices, so a change
+#   to the loop of one has to be made to the other
+def do_instrumented_search(init_state, ignore_dups, stats, weight):
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+        'states_evaluated_per_layer' : {},
+    }
+    counters = stats.counters
+    timers = stats.timers
+    clock = time.perf_counter
+    progress_interval = stats.progress_interval if stats.progress else 0
+
+    stats.begin()
+    try:
+        # the states of this search use the timed heuristic, init_state is left as it is
+        root = State(init_state.key, init_state.cost, init_state.parent_blank, stats.timed_heuristic(init_state.heuristic_function),
+                     init_state.heuristic_only, init_state.blank, init_state.spec, init_state.heuristic)
+        frontier = OpenList(lazy_deletion = ignore_dups)
+        frontier.push(root, get_priority(root, weight))
+        counters['pushes'] += 1
+
+        stride = init_state.size + 1
+        duplicates = {root.key:closed_entry(root.cost, None, stride)}
+        per_layer = res['states_evaluated_per_layer']
+
+        spec = root.spec
+        bits = spec.bits
+        successors = spec.successors
+        heuristic_function = root.heuristic_function
+        heuristic_only = root.heuristic_only
+        delta = getattr(heuristic_function, 'delta', None)
+
+        while(len(frontier) > 0):
+            if timers is not None: start = clock()
+            f, curr_state = frontier.pop()
+            if timers is not None: timers['pop'] += clock() - start
+            counters['pops'] += 1
+
+            res['states_evaluated'] += 1
+            per_layer[f] = per_layer.get(f, 0) + 1
+            if curr_state.is_goal():
+                if ignore_dups:
+                    res['path'] = get_solution_path(init_state, curr_state, duplicates)
+                res['solutions'].append(curr_state)
+                break
+
+            counters['expanded'] += 1
+            key, blank, h = curr_state.key, curr_state.blank, curr_state.heuristic
+            cost = curr_state.cost + 1
+            parent_blank = curr_state.parent_blank
+
+            for tile_index in successors[blank][parent_blank]:
+                if timers is not None: start = clock()
+                child_key = move(key, blank, tile_index, bits)
+                if timers is not None: timers['expand'] += clock() - start
+                counters['generated'] += 1
+
+                reopened = False
+                if ignore_dups:
+                    if timers is not None: start = clock()
+                    known = duplicates.get(child_key)
+                    reopened = known is not None and cost < closed_cost(known, stride)
+                    if known is None or reopened:
+                        duplicates[child_key] = closed_entry(cost, blank, stride)
+                    if timers is not None: timers['dedup'] += clock() - start
+                    if not (known is None or reopened):
+                        counters['duplicates'] += 1
+                        continue
+
+                # the heuristic (timed by its wrapper) is only computed for the children that are kept
+                if timers is not None:
+                    heuristic_time = timers['heuristic']
+                    start = clock()
+                child_h = h + delta(spec, tile_at(key, tile_index, bits), tile_index, blank) if delta else None
+                child = State(child_key, cost, blank, heuristic_function, heuristic_only, tile_index, spec, child_h)
+                if timers is not None:
+                    timers['expand'] += clock() - start - (timers['heuristic'] - heuristic_time)
+
+                if timers is not None: start = clock()
+                frontier.push(child, get_priority(child, weight))
+                if timers is not None: timers['push'] += clock() - start
+                counters['pushes'] += 1
+                counters['reopenings'] += reopened
+
+            res['max_frontier_size'] = max(res['max_frontier_size'],len(frontier))
+            if progress_interval and counters['expanded'] % progress_interval == 0:
+                stats.report_progress(f, len(frontier))
+    finally:
+        stats.end()
+    res['stats'] = stats.as_dict()
+    return res
+
+# closed table of the best first searches (do_search, anytime.py, vectorized.py)
+#   keyed on the packed board (see packed.py), the value is a single int with the
+#   cheapest cost found so far and the index of the blank in the parent board:
+#   cost * stride + parent_blank + 1 with stride = size + 1 (parent_blank None for
+#   the initial board), which is all that is needed to rebuild the solution path
+def closed_entry(cost, parent_blank, stride):
+    return cost * stride + (0 if parent_blank is None else parent_blank + 1)
+
+def closed_cost(entry, stride):
+    return entry // stride
+
+# index of the blank in the parent board, -1 for the initial board
+def closed_parent_blank(entry, stride):
+    return entry % stride - 1
+
+# rebuilds the list of states from init_state to the board key with its blank at
+#   index blank from a closed table
+def get_closed_path(init_state, key, blank, duplicates):
+    stride = init_state.size + 1
+    bits = init_state.spec.bits
+    moves = []
+    parent_blank = closed_parent_blank(duplicates[key], stride)
+    while parent_blank >= 0:
+        moves.append(blank)
+        # moving the tile at parent_blank back into the blank gives the parent board
+        key = move(key, blank, parent_blank, bits)
+        blank = parent_blank
+        parent_blank = closed_parent_blank(duplicates[key], stride)
+    moves.reverse()
+    return build_path(init_state, moves)
+
+# rebuilds the list of states from init_state to goal_state from the closed table of do_search
+def get_solution_path(init_state, goal_state, duplicates):
+    return get_closed_path(init_state, goal_state.key, goal_state.blank, duplicates)
+
+# creates a random solvable config of the puzzle
+#   uniformly among all solvable configs (see instances.py)
+# inputs : the goal array
+def shuffle_puzzle(goal):
+    return random_solvable_puzzle(get_spec(goal))
+
+
+# returns the indices of the tiles that can be moved into the blank of puzzle
+#   spec is the PuzzleSpec of the board (default: the spec of the goal in puzzle_globals.py)
+def get_movable_tiles(puzzle, spec = None):
+    spec = spec or get_default_spec()
+    return list(spec.move_table[puzzle.index(0)])
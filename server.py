@@ -0,0 +1,291 @@
+import os
+import json
+import math
+import time
+import signal
+import asyncio
+import argparse
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from algorithms import ALGORITHMS, get_heuristic, check_client_options, prepare_tables
+from state import State
+from stream import solve_record, get_board_spec
+
+# asyncio solve server, the searches run in a pool of worker processes
+#
+#   py server.py [--port 8080 | --unix /tmp/npuzzle.sock] [--workers 4] [--max-queue 1000]
+#                [--batch-size 16] [--batch-window 0.005] [--deadline 30] [--warm a_star_md ...]
+#                [--sizes 9 16]
+#
+# POST /solve  {"board" : [tiles], "algorithm" : name, "options" : {...}, "deadline" : seconds}
+#   answers the output line of stream.py ({"id", "status", "cost", "moves", ...}),
+#   everything but board is optional, the board must have one of the sizes of the
+#   server (--sizes), deadline is a positive number of seconds and options can only
+#   set the options of CLIENT_OPTIONS in algorithms.py (bad requests get 400)
+#   - requests for an instance that is already being solved (same board, algorithm and
+#     options) wait for the same result instead of being solved again
+#   - requests are queued and sent to the workers in batches of up to batch_size,
+#     a batch is sent when it is full or batch_window seconds after its first request
+#   - when max_queue instances are queued or being solved new requests get 503
+#   - a request that isnt answered within its deadline gets 504 (the instance is
+#     still solved for the other requests waiting for it)
+# GET /metrics
+#   {queue_depth, in_flight, requests, deduplicated, rejected, deadline_exceeded,
+#    completed, latency : {p50, p90, p99, max} in milliseconds}
+#
+# the worker processes load the heuristic tables of the warm algorithms when they
+#   start, so the tables are shared by every request the worker solves
+
+# latencies kept for the percentiles of /metrics
+LATENCY_WINDOW = 10000
+
+STATUS_TEXT = {200 : 'OK', 400 : 'Bad Request', 404 : 'Not Found', 500 : 'Internal Server Error', 503 : 'Service Unavailable', 504 : 'Gateway Timeout'}
+
+# pool initializer, loads the heuristic tables of algorithms for the boards of sizes
+#   (missing pattern databases are built by the server process before, see start)
+def warm_tables(algorithms, sizes):
+    # only the server process handles SIGINT and SIGTERM
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for size in sizes:
+        spec = get_board_spec(list(range(size)))
+        for algorithm in algorithms:
+            heuristic_function = get_heuristic(ALGORITHMS[algorithm]['heuristic'], spec)
+            if heuristic_function:
+                heuristic_function(State(list(spec.goal), 0, None, spec = spec))
+
+# runs in the worker processes
+def solve_records(jobs, timeout, max_nodes):
+    return [solve_record(job, None, False, timeout, max_nodes) for job in jobs]
+
+def get_percentile(values, percentile):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+class SolveServer:
+    def __init__(self, workers = None, max_queue = 1000, batch_size = 16, batch_window = 0.005, deadline = 30,
+                 timeout = 60, max_nodes = None, algorithm = 'a_star_md', warm = None, sizes = (9, 16)):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.deadline = deadline
+        self.timeout = timeout
+        self.max_nodes = max_nodes
+        self.algorithm = algorithm
+        self.warm = warm if warm is not None else [algorithm]
+        self.sizes = sizes
+
+        # futures of the instances queued or being solved, by (board, algorithm, options)
+        self.pending = {}
+        # futures of the tables built by this process, by (algorithm, board size)
+        self.prepared = {}
+        self.in_flight = 0
+        self.latencies = collections.deque(maxlen = LATENCY_WINDOW)
+        self.metrics = dict.fromkeys(['requests', 'deduplicated', 'rejected', 'deadline_exceeded', 'completed'], 0)
+
+    async def start(self, host = '127.0.0.1', port = 8080, unix = None):
+        for size in self.sizes:
+            prepare_tables(self.warm, get_board_spec(list(range(size))))
+        self.executor = self.create_executor()
+        self.queue = asyncio.Queue()
+        # at most one batch per worker is sent at a time, the others wait in the queue
+        self.slots = asyncio.Semaphore(self.workers)
+        self.batcher = asyncio.create_task(self.batch_loop())
+        if unix:
+            self.server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    # the workers are started from a forkserver (spawned where there is none): the pool
+    #   starts them on the first requests, forked from this process they would inherit
+    #   the listening socket and the sockets of the open connections, which then never
+    #   get their EOF
+    def create_executor(self):
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(max_workers = self.workers, mp_context = multiprocessing.get_context(method),
+                                   initializer = warm_tables, initargs = (self.warm, self.sizes))
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        self.executor.shutdown(wait = False, cancel_futures = True)
+        # doesnt wait for the instances being solved
+        for process in multiprocessing.active_children():
+            process.terminate()
+
+    # solves one request, returns (http status, response dictionary)
+    async def solve(self, request):
+        start = time.perf_counter()
+        self.metrics['requests'] += 1
+        if not isinstance(request, dict) or not isinstance(request.get('board'), list) or not all(isinstance(tile, int) for tile in request['board']):
+            return 400, {'error' : 'the request needs a board (list of tiles)'}
+        if not len(request['board']) in self.sizes:
+            return 400, {'error' : 'boards must have %s tiles' % ' or '.join(str(size) for size in self.sizes)}
+        algorithm = request.get('algorithm', self.algorithm)
+        options = request.get('options')
+        deadline = request.get('deadline', self.deadline)
+        if not isinstance(algorithm, str) or not algorithm in ALGORITHMS:
+            return 400, {'error' : 'unknown algorithm'}
+        if isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or not 0 < deadline < math.inf:
+            return 400, {'error' : 'deadline must be a positive number of seconds'}
+        error = check_client_options(algorithm, options)
+        if error:
+            return 400, {'error' : error}
+
+        key = (tuple(request['board']), algorithm, json.dumps(options, sort_keys = True))
+        future = self.pending.get(key)
+        if future is not None:
+            self.metrics['deduplicated'] += 1
+        else:
+            if len(self.pending) >= self.max_queue:
+                self.metrics['rejected'] += 1
+                return 503, {'error' : 'too many queued instances'}
+            future = asyncio.get_running_loop().create_future()
+            self.pending[key] = future
+            self.queue.put_nowait((key, (request.get('id'), request['board'], algorithm, options), future))
+
+        try:
+            # shielded so a request that gives up doesnt cancel the result of the others
+            res = await asyncio.wait_for(asyncio.shield(future), deadline)
+        except asyncio.TimeoutError:
+            self.metrics['deadline_exceeded'] += 1
+            return 504, {'error' : 'deadline exceeded'}
+
+        self.metrics['completed'] += 1
+        self.latencies.append(time.perf_counter() - start)
+        return 200, dict(res, id = request.get('id'))
+
+    # takes batches from the queue and sends them to the workers
+    async def batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            batch_end = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), batch_end - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            await self.slots.acquire()
+            asyncio.create_task(self.run_batch(batch))
+
+    # builds the pattern databases of an algorithm for boards of size in a thread of this
+    #   process, once (the workers never build them, see get_heuristic in algorithms.py)
+    #   (the tables of the warm algorithms are already there, see start)
+    def prepare(self, algorithm, size):
+        if not (algorithm, size) in self.prepared:
+            spec = get_board_spec(list(range(size)))
+            self.prepared[algorithm, size] = asyncio.get_running_loop().run_in_executor(None, prepare_tables, [algorithm], spec)
+        return self.prepared[algorithm, size]
+
+    async def run_batch(self, batch):
+        self.in_flight += len(batch)
+        try:
+            jobs = [job for key, job, future in batch]
+            for algorithm, size in set((job[2], len(job[1])) for job in jobs):
+                await self.prepare(algorithm, size)
+            results = await asyncio.get_running_loop().run_in_executor(self.executor, solve_records, jobs, self.timeout, self.max_nodes)
+            for (key, job, future), res in zip(batch, results):
+                future.set_result(res)
+        except Exception as e:
+            # a worker that died takes the whole pool with it, the next batches get a new one
+            if isinstance(e, BrokenProcessPool):
+                self.executor = self.create_executor()
+            for key, job, future in batch:
+                if not future.done():
+                    future.set_result({'id' : job[0], 'status' : 'error', 'error' : str(e)})
+        finally:
+            for key, job, future in batch:
+                del self.pending[key]
+            self.in_flight -= len(batch)
+            self.slots.release()
+
+    def get_metrics(self):
+        latencies = sorted(self.latencies)
+        res = dict(self.metrics)
+        res['queue_depth'] = self.queue.qsize()
+        res['in_flight'] = self.in_flight
+        res['latency'] = {name : get_percentile(latencies, percentile) * 1000 for name, percentile in (('p50', 50), ('p90', 90), ('p99', 99), ('max', 100))}
+        return res
+
+    # minimal http/1.1, one request per connection
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+            if len(request_line) < 2:
+                status, res = 400, {'error' : 'bad request line'}
+            elif request_line[:2] == ['GET', '/metrics']:
+                status, res = 200, self.get_metrics()
+            elif request_line[:2] == ['POST', '/solve']:
+                try:
+                    request = json.loads(body or b'null')
+                except ValueError:
+                    status, res = 400, {'error' : 'body is not json'}
+                else:
+                    try:
+                        status, res = await self.solve(request)
+                    except Exception as e:
+                        # a request that slipped through the checks still gets an answer
+                        status, res = 500, {'error' : str(e)}
+            else:
+                status, res = 404, {'error' : 'unknown path'}
+
+            data = json.dumps(res).encode()
+            writer.write(('HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n'
+                          % (status, STATUS_TEXT[status], len(data))).encode() + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(args):
+    server = SolveServer(args.workers, args.max_queue, args.batch_size, args.batch_window, args.deadline,
+                         args.timeout, args.max_nodes, args.algorithm, args.warm, tuple(args.sizes))
+    await server.start(args.host, args.port, args.unix)
+    print('listening on', args.unix or '%s:%d' % (args.host, args.port))
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description = 'n puzzle solve server')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8080)
+    parser.add_argument('--unix', help = 'unix socket path, instead of host and port')
+    parser.add_argument('--workers', type = int)
+    parser.add_argument('--max-queue', type = int, default = 1000, help = 'queued or running instances before 503')
+    parser.add_argument('--batch-size', type = int, default = 16)
+    parser.add_argument('--batch-window', type = float, default = 0.005, help = 'seconds to wait to fill a batch')
+    parser.add_argument('--deadline', type = float, default = 30, help = 'default seconds per request before 504')
+    parser.add_argument('--timeout', type = float, default = 60, help = 'seconds per instance in the workers')
+    parser.add_argument('--max-nodes', type = int, help = 'states evaluated per instance in the workers')
+    parser.add_argument('--algorithm', default = 'a_star_md', choices = sorted(ALGORITHMS))
+    parser.add_argument('--sizes', nargs = '+', type = int, default = [9, 16], help = 'number of tiles of the boards that are solved')
+    parser.add_argument('--warm', nargs = '*', choices = sorted(ALGORITHMS), help = 'algorithms whose heuristic tables are loaded by the workers at start')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+import time
+import sqlite3
+
+# persistent cache of solved instances, shared by runs and processes (sqlite file)
+#
+# solutions has one row per (spec, packed board, algorithm) with the solution cost,
+#   the moves (see get_moves in state.py) and the stats of the search, so a search that
+#   was already done can be skipped
+# distances has the exact optimal cost to the goal of every board on the solution path
+#   of an optimal algorithm, these can be used as perfect heuristic values later on
+#   (see ExactDistanceHeuristic)
+# both tables are bounded, the least recently used rows are removed first, a row is
+#   used when it is read by get or when its cost is a heuristic value of a search
+#   the limits are checked on the first put of a process and then once EVICT_FRACTION
+#   of the limit of a table was inserted by this process since the last check, so a
+#   table stays within about (1 + EVICT_FRACTION) times its limit
+#
+# the packed boards are stored as text since they dont always fit in 64 bits
+
+# fraction of the limit of a table inserted between two checks of its size (a check
+#   counts the rows of the table)
+EVICT_FRACTION = 0.1
+
+# identifies a spec in the cache, rows x cols and the goal
+def get_spec_id(spec):
+    return '%dx%d:%s' % (spec.rows, spec.cols, ','.join(str(tile) for tile in spec.goal))
+
+class SolutionCache:
+    def __init__(self, path, max_entries = 1000000, max_distances = 1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_distances = max_distances
+        # in memory index of the distances table, spec id -> {packed board : cost}
+        self.distances = {}
+        # rows inserted in each table since its last check, the first put checks both
+        self.inserted = {'solutions' : max_entries, 'distances' : max_distances}
+
+        self.connection = sqlite3.connect(path, timeout = 60)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS solutions (
+                spec TEXT, board TEXT, algorithm TEXT, cost INTEGER, moves TEXT,
+                states_evaluated INTEGER, max_frontier_size INTEGER, time REAL, last_used REAL,
+                PRIMARY KEY (spec, board, algorithm));
+            CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+            CREATE TABLE IF NOT EXISTS distances (
+                spec TEXT, board TEXT, cost INTEGER, last_used REAL,
+                PRIMARY KEY (spec, board));
+            CREATE INDEX IF NOT EXISTS distances_last_used ON distances (last_used);
+        ''')
+
+    def close(self):
+        self.connection.close()
+
+    # returns the cached result of solve (see algorithms.py) or None
+    def get(self, spec, key, algorithm):
+        row = self.connection.execute(
+            'SELECT cost, moves, states_evaluated, max_frontier_size, time FROM solutions WHERE spec = ? AND board = ? AND algorithm = ?',
+            (get_spec_id(spec), str(key), algorithm)).fetchone()
+        if row is None:
+            return None
+
+        with self.connection:
+            self.connection.execute('UPDATE solutions SET last_used = ? WHERE spec = ? AND board = ? AND algorithm = ?',
+                                    (time.time(), get_spec_id(spec), str(key), algorithm))
+        return {
+            'cost' : row[0],
+            'moves' : row[1],
+            'states_evaluated' : row[2],
+            'max_frontier_size' : row[3],
+            'time' : row[4],
+            'cached' : True,
+        }
+
+    # stores the result of solve, path is the solution path (list of states)
+    #   with optimal = True the exact cost of every board on the path is stored too
+    def put(self, spec, key, algorithm, result, path = None, optimal = False):
+        spec_id = get_spec_id(spec)
+        now = time.time()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (spec_id, str(key), algorithm, result['cost'], result.get('moves'),
+                                     result['states_evaluated'], result['max_frontier_size'], result.get('time'), now))
+            if optimal and path:
+                rows = [(spec_id, str(state.key), result['cost'] - state.cost, now) for state in path]
+                self.connection.executemany('INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?)', rows)
+                if spec_id in self.distances:
+                    for state in path:
+                        self.distances[spec_id][state.key] = result['cost'] - state.cost
+                self.inserted['distances'] += len(rows)
+            self.inserted['solutions'] += 1
+            self.evict()
+
+    # removes the least recently used rows over the size limits, of the tables with
+    #   EVICT_FRACTION of their limit inserted since their last check
+    def evict(self):
+        for table, limit in (('solutions', self.max_entries), ('distances', self.max_distances)):
+            if self.inserted[table] < max(1, limit * EVICT_FRACTION):
+                continue
+            self.inserted[table] = 0
+            count = self.connection.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+            if count > limit:
+                self.connection.execute('DELETE FROM %s WHERE rowid IN (SELECT rowid FROM %s ORDER BY last_used LIMIT ?)' % (table, table),
+                                        (count - limit,))
+                # reloaded without the removed rows by get_distances
+                if table == 'distances':
+                    self.distances = {}
+
+    # marks the exact costs of boards of a spec as used now (see ExactDistanceHeuristic)
+    def touch_distances(self, spec, keys):
+        if not keys:
+            return
+        spec_id = get_spec_id(spec)
+        now = time.time()
+        with self.connection:
+            self.connection.executemany('UPDATE distances SET last_used = ? WHERE spec = ? AND board = ?',
+                                        [(now, spec_id, str(key)) for key in keys])
+
+    # exact optimal costs of the boards of a spec, loaded once
+    def get_distances(self, spec):
+        spec_id = get_spec_id(spec)
+        if not spec_id in self.distances:
+            rows = self.connection.execute('SELECT board, cost FROM distances WHERE spec = ?', (spec_id,))
+            self.distances[spec_id] = {int(board) : cost for board, cost in rows}
+        return self.distances[spec_id]
+
+    # heuristic function that uses the exact cost of the boards in the cache and
+    #   base (another heuristic function) for every other board
+    def heuristic(self, base, spec):
+        return ExactDistanceHeuristic(base, self.get_distances(spec))
+
+# heuristic with perfect values for the boards solved optimally before
+#   exact costs are never smaller than an admissible estimate, so it stays admissible
+#   used is the set of the boards whose exact cost was looked up, to be passed to
+#   touch_distances of the cache after the search
+class ExactDistanceHeuristic:
+    def __init__(self, base, distances):
+        self.base = base
+        self.distances = distances
+        self.used = set()
+
+    def __call__(self, state):
+        cost = self.distances.get(state.key)
+        if cost is not None:
+            self.used.add(state.key)
+            return cost
+        return self.base(state) if self.base else 0
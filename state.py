@@ -1,36 +1,72 @@
-import math
-from puzzle_globals import Globals
+from packed import *
+from puzzle_spec import get_default_spec
 
 # This is the state representation for the n-puzzle problem
-# puz is a one dimensional list of numbers
+# key is the board packed into a single integer (see packed.py)
+#   puz is still available as a one dimensional list of numbers, but it is only
+#   a view built from key (used for printing, plotting and heuristics)
 #   the numbers represent individual tiles
-#   the length of the list is row * col where row = col = sqrt(n+1)
+#   the length of the list is rows * cols of the spec
 #   we use this so then it'll be easier to find the index of any tile in the list
+# blank is the index of the blank tile (0) in the list
+# spec is the PuzzleSpec with the shape of the board and the goal (see puzzle_spec.py)
+#   default: the square board with the goal in puzzle_globals.py
 #
 # cost is the accumulated path cost to this state
 #   cost = number of tiles moved (1)
 #   this also means cost = depth
 #
+# parent_blank is the index of the blank in the parent state (None for the initial state)
+#   states dont keep a reference to their parent so a node doesnt keep its whole
+#   ancestry alive, the searches rebuild the solution path at the end instead
+#   (moving the tile at parent_blank back into the blank gives the parent board)
+#
 class State:
+    __slots__ = ('key', 'blank', 'spec', 'cost', 'parent_blank', 'heuristic_function', 'heuristic_only', 'heuristic')
+
     # standard init function for the class with all the needed params
-    def __init__(self, puz, cost, parent, heuristic_function = None, heuristic_only = False):
-        self.puz = puz
+    # puz is either the list of tiles or an already packed board, in which case
+    #   the index of the blank must be given
+    # heuristic is the already known heuristic value of this state (see expand),
+    #   when it is not given it is computed with heuristic_function
+    def __init__(self, puz, cost, parent_blank, heuristic_function = None, heuristic_only = False, blank = None, spec = None, heuristic = None):
+        self.spec = spec or get_default_spec()
+        if isinstance(puz, int):
+            self.key = puz
+            self.blank = blank
+        else:
+            if len(puz) != self.spec.size:
+                raise ValueError('board has %d tiles, the spec has %d' % (len(puz), self.spec.size))
+            self.key = pack(puz)
+            self.blank = puz.index(0)
         self.cost = cost
-        self.parent = parent
+        self.parent_blank = parent_blank
         self.heuristic_function = heuristic_function
         self.heuristic_only = heuristic_only
         self.heuristic = 0
 
-        if self.heuristic_function:
+        if heuristic is not None:
+            self.heuristic = heuristic
+        elif self.heuristic_function:
             self.heuristic = heuristic_function(self)
 
+    @property
+    def size(self):
+        return self.spec.size
+
+    @property
+    def puz(self):
+        return unpack(self.key, self.spec.size)
+
     def __str__(self):
-        total_rows = total_cols = int(math.sqrt(len(self.puz)))
+        puz = self.puz
+        total_rows = self.spec.rows
+        total_cols = self.spec.cols
         chunked = []
         for i in range(total_rows):
             temp = []
             for j in range(total_cols):
-                temp.append(self.puz[i * total_cols + j])
+                temp.append(puz[i * total_cols + j])
             chunked.append(temp)
 
         str_out = ""
@@ -39,72 +75,69 @@ class State:
 
         return str_out + str(self.cost)
 
-    def __compare(self, other):
-        if self.heuristic_only:
-            return self.heuristic - other.heuristic
-        else:
-            return (self.cost + self.heuristic) - (other.cost + other.heuristic)
-
-    def __lt__(self,other):
-        return self.__compare(other) < 0
-
-    def __gt__(self,other):
-        return self.__compare(other) > 0
-
-    def __eq__(self,other):
-        return self.__compare(other) == 0
-
-    def __ne__(sefl,other):
-        return self.__compare(other) != 0
-
-    def __le__(self,other):
-        return self.__compare(other) <= 0
-
-    def __ge__(self,other):
-        return self.__compare(other) >= 0
-
     # check whether this state is a goal state or not
     def is_goal(self):
-        if self.puz == Globals.GOAL:
+        if self.key == self.spec.goal_key:
             return True
         else:
             return False
 
+    # yields the moves of this state lazily as (tile_index, delta) pairs without making
+    #   any child board or State: tile_index is the tile moved into the blank and delta
+    #   the change of the heuristic (None when the heuristic has no delta function, the
+    #   child then computes its value itself, see child)
+    # order is an optional move ordering, a function that takes the list of pairs and
+    #   returns them in the order to try (see order_by_heuristic)
+    def successors(self, order = None):
+        spec = self.spec
+        moves = spec.successors[self.blank][self.parent_blank]
+        delta = getattr(self.heuristic_function, 'delta', None)
+        pairs = ((tile_index, delta(spec, tile_at(self.key, tile_index, spec.bits), tile_index, self.blank) if delta else None)
+                 for tile_index in moves)
+        if order:
+            return iter(order(list(pairs)))
+        return pairs
+
+    # the state after moving the tile at tile_index into the blank
+    #   delta is the change of the heuristic given by successors (None: computed)
+    def child(self, tile_index, delta = None):
+        # the packed board is immutable so this doesnt affect this state
+        child_key = move(self.key, self.blank, tile_index, self.spec.bits)
+        heuristic = self.heuristic + delta if delta is not None else None
+        return State(child_key, self.cost + 1, self.blank, self.heuristic_function, self.heuristic_only, tile_index, self.spec, heuristic)
+
     # function that returns all the possible moves that can be done from this State
     # as a list of states
-    def expand(self):
-        des = []
-        total_rows = total_cols = int(math.sqrt(len(self.puz)))
-        # looks for the empty space
-        # this will be used to deptermine the tiles that can be moved and where (index of 0)
-        blank_index = self.puz.index(0)
-        # calculate the row and col on a '2D' list from a 1D list
-        blank_row = blank_index // total_cols
-        blank_col = blank_index % total_cols
-
-        # list of movable tiles (around the blank tile - top , left, bottom, right)
-        # each item in the list is the ordered pair of row and col for each tile
-        movable_tiles =     [[blank_row - 1, blank_col], # top
-                            [blank_row, blank_col - 1], # left
-                            [blank_row + 1, blank_col], # bottom
-                            [blank_row, blank_col + 1]] # right
-
-        for tile in movable_tiles:
-            # check if the movable tile is inside the grid
-            if  tile[0] >= 0 and tile[0] < total_rows and \
-                tile[1] >= 0 and tile[1] < total_cols:
-                # calculate actual index of the tile in a one dimensional list
-                actual_index = tile[0] * total_cols + tile[1]
-                # clone list, so it doesnt affect the old list
-                temp_list = list(self.puz)
-                # swap the blank tiles
-                # intermidiate variables
-                a = blank_index
-                b = actual_index
-                temp_list[a], temp_list[b] = temp_list[b], temp_list[a]
-                if self.parent:
-                    if temp_list != self.parent.puz:
-                        des.append(State(temp_list, self.cost + 1, self, self.heuristic_function,self.heuristic_only))
-                else:
-                    des.append(State(temp_list, self.cost + 1, self, self.heuristic_function,self.heuristic_only))
-        return des
+    #   the searches use successors and only make the children they keep
+    def expand(self, order = None):
+        return [self.child(tile_index, delta) for tile_index, delta in self.successors(order)]
+
+# move ordering for State.successors: the moves that lower the heuristic the most first
+#   (the order of move_table is kept between equal deltas and when there are no deltas)
+def order_by_heuristic(pairs):
+    if any(delta is None for tile_index, delta in pairs):
+        return pairs
+    return sorted(pairs, key = lambda pair: pair[1])
+
+# builds the list of states from init_state to the end of a solution
+#   moves is the list of the tile indices moved into the blank, in order
+def build_path(init_state, moves):
+    bits = init_state.spec.bits
+    path = [init_state]
+    for tile_index in moves:
+        state = path[-1]
+        child_key = move(state.key, state.blank, tile_index, bits)
+        path.append(State(child_key, state.cost + 1, state.blank, state.heuristic_function, state.heuristic_only, tile_index, state.spec))
+    return path
+
+# returns the moves of a path (list of states) as a string, one letter per move
+#   for the direction the blank moved: U (up), L (left), D (down), R (right)
+def get_moves(path):
+    res = []
+    for i in range(1, len(path)):
+        difference = path[i].blank - path[i - 1].blank
+        if difference == -path[i].spec.cols: res.append('U')
+        elif difference == -1: res.append('L')
+        elif difference == path[i].spec.cols: res.append('D')
+        else: res.append('R')
+    return ''.join(res)
@@ -0,0 +1,184 @@
+import sys
+import json
+import signal
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from algorithms import ALGORITHMS, prepare_tables
+from batch import solve_job
+from instances import is_solvable
+from puzzle_spec import get_spec
+
+# streaming solver, reads instances from jsonl files (or stdin) and writes one json
+#   result line per instance to stdout as soon as it is solved
+#
+#   py stream.py [files ...] [--algorithm a_star_md] [--workers 4] [--timeout 10] [--max-nodes 1000000]
+#                [--cols 4] [--blank-first] [--cache cache.sqlite [--exact-heuristic]]
+#
+# an input line is either the list of tiles of a board or an object
+#   {"id" : any, "board" : [tiles], "algorithm" : name, "options" : {...}}
+#   where everything but board is optional (id defaults to the line number, algorithm
+#   and options to the ones on the command line, see solve in algorithms.py)
+# an output line is
+#   {"id", "status" : "solved", "cost", "moves", "states_evaluated", "max_frontier_size", "time"}
+#   or {"id", "status" : "timeout" | "node_limit" | "error", "error" : message}
+#   --max-nodes only applies to the algorithms that search with do_search, a job of
+#   another algorithm gets an error when it is set
+#
+# only the lines being solved are in memory (at most 2 per worker), so any number of
+#   instances can be streamed through, with several workers the results are written
+#   in the order they finish, not in the input order
+# with --cache instances solved before are answered from a solution cache (see
+#   solution_cache.py), --exact-heuristic also uses its optimal costs as heuristic values
+# SIGINT and SIGTERM stop the stream: no more lines are read, the instances being
+#   solved are dropped and a summary is written to stderr
+
+# a BaseException so the except Exception of solve_record doesnt turn it into an error line
+class StreamCancelled(BaseException):
+    pass
+
+def cancel(signum, frame):
+    raise StreamCancelled()
+
+# pool initializer, only the main process handles the cancellation: forked workers
+#   would inherit its SIGTERM handler and swallow the terminate of the cancellation
+def init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+# yields (line number, line) of the files, '-' is stdin
+def read_lines(paths):
+    number = 0
+    for path in paths or ['-']:
+        f = sys.stdin if path == '-' else open(path)
+        try:
+            for line in f:
+                number += 1
+                line = line.strip()
+                if line:
+                    yield number, line
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+# turns an input line into a job (id, board, algorithm, options)
+def parse_line(number, line, algorithm):
+    record = json.loads(line)
+    if isinstance(record, list):
+        record = {'board' : record}
+    return record.get('id', number), record['board'], record.get('algorithm', algorithm), record.get('options')
+
+# spec of a board, boards are square unless cols is given
+#   with blank_first the goal has the blank in the top left
+def get_board_spec(board, cols = None, blank_first = False):
+    goal = list(range(len(board))) if blank_first else list(range(1, len(board))) + [0]
+    return get_spec(goal, cols)
+
+# solves one job, runs in the worker processes
+# returns the output line of the job as a dictionary
+def solve_record(job, cols, blank_first, timeout, max_nodes, cache_path = None, exact_heuristic = False):
+    instance_id, board, algorithm, options = job
+    res = {'id' : instance_id}
+    try:
+        if not algorithm in ALGORITHMS:
+            raise ValueError('unknown algorithm %s' % algorithm)
+        spec = get_board_spec(board, cols, blank_first)
+        if sorted(board) != list(range(spec.size)):
+            raise ValueError('board is not a permutation of 0..%d' % (spec.size - 1))
+        if not is_solvable(board, spec):
+            raise ValueError('board is not solvable')
+        result = solve_job(board, algorithm, spec, timeout, cache_path, max_nodes = max_nodes, options = options,
+                           exact_heuristic = exact_heuristic)
+    except Exception as e:
+        res.update({'status' : 'error', 'error' : str(e)})
+        return res
+
+    if result.get('timed_out'):
+        res['status'] = 'timeout'
+    elif result.get('node_limit'):
+        res['status'] = 'node_limit'
+    else:
+        res['status'] = 'solved'
+        res.update((name, result[name]) for name in ('cost', 'moves', 'states_evaluated', 'max_frontier_size', 'time'))
+    return res
+
+# builds the pattern databases of the algorithm of a job in this process, once for
+#   every (algorithm, board size) in prepared, the worker processes never build them
+#   (see get_heuristic in algorithms.py)
+#   bad jobs are left to solve_record, which reports them
+def prepare_job(job, cols, blank_first, prepared):
+    instance_id, board, algorithm, options = job
+    if not isinstance(algorithm, str) or ALGORITHMS.get(algorithm, {}).get('heuristic') != 'pattern_db' or not isinstance(board, list):
+        return
+    if not (algorithm, len(board)) in prepared:
+        prepared.add((algorithm, len(board)))
+        prepare_tables([algorithm], get_board_spec(board, cols, blank_first))
+
+# solves the jobs, calls output with every result as soon as it is ready
+#   workers > 1 solves them in that many processes with at most 2 jobs per worker queued
+def solve_stream(jobs, output, workers = 1, cols = None, blank_first = False, timeout = None, max_nodes = None,
+                 cache_path = None, exact_heuristic = False):
+    if workers == 1:
+        for job in jobs:
+            output(solve_record(job, cols, blank_first, timeout, max_nodes, cache_path, exact_heuristic))
+        return
+
+    prepared = set()
+    with ProcessPoolExecutor(max_workers = workers, initializer = init_worker) as executor:
+        pending = set()
+        try:
+            for job in jobs:
+                prepare_job(job, cols, blank_first, prepared)
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        output(future.result())
+                pending.add(executor.submit(solve_record, job, cols, blank_first, timeout, max_nodes, cache_path, exact_heuristic))
+            for future in wait(pending).done:
+                output(future.result())
+        except BaseException:
+            # doesnt wait for the instances being solved
+            executor.shutdown(wait = False, cancel_futures = True)
+            for process in multiprocessing.active_children():
+                process.terminate()
+            raise
+
+def main():
+    parser = argparse.ArgumentParser(description = 'streaming n puzzle solver, jsonl in and out')
+    parser.add_argument('files', nargs = '*', help = 'jsonl files of instances (default: stdin)')
+    parser.add_argument('--algorithm', default = 'a_star_md', choices = sorted(ALGORITHMS))
+    parser.add_argument('--workers', type = int, default = 1)
+    parser.add_argument('--timeout', type = float, help = 'seconds per instance')
+    parser.add_argument('--max-nodes', type = int, help = 'states evaluated per instance')
+    parser.add_argument('--cols', type = int, help = 'columns of the boards (default: square boards)')
+    parser.add_argument('--blank-first', action = 'store_true', help = 'the goal has the blank in the top left')
+    parser.add_argument('--cache', help = 'solution cache file (sqlite)')
+    parser.add_argument('--exact-heuristic', action = 'store_true', help = 'use the optimal costs in the cache as heuristic values')
+    args = parser.parse_args()
+
+    counts = {}
+    def output(res):
+        counts[res['status']] = counts.get(res['status'], 0) + 1
+        sys.stdout.write(json.dumps(res) + '\n')
+        sys.stdout.flush()
+
+    # lines that arent json are reported as errors without stopping the stream
+    def jobs():
+        for number, line in read_lines(args.files):
+            try:
+                yield parse_line(number, line, args.algorithm)
+            except (ValueError, KeyError, AttributeError) as e:
+                output({'id' : number, 'status' : 'error', 'error' : 'bad input line: %s' % e})
+
+    signal.signal(signal.SIGTERM, cancel)
+    try:
+        solve_stream(jobs(), output, args.workers, args.cols, args.blank_first, args.timeout, args.max_nodes,
+                     args.cache, args.exact_heuristic)
+    except (StreamCancelled, KeyboardInterrupt):
+        counts['cancelled'] = True
+    sys.stderr.write(json.dumps(counts) + '\n')
+    if counts.get('cancelled'):
+        sys.exit(130)
+
+if __name__ == '__main__':
+    main()
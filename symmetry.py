@@ -0,0 +1,62 @@
+from packed import pack, unpack
+
+# diagonal reflection symmetry of the n puzzle
+#
+# on a square board whose goal has the blank on the main diagonal (the default goal
+#   1 ... n * n - 1, 0 has it in the corner) reflecting a board in the diagonal and
+#   renaming every tile to the goal tile of its reflected goal cell gives another board
+#   with the same distance to the goal: the goal is its own reflection and every move
+#   of the blank is reflected into a move of the blank
+#   cell_map[index] is the reflected index of a cell, tile_map[tile] the renamed tile,
+#   both are their own inverse
+#
+# the retrograde searches from the goal use it, a board and its reflection always have
+#   the same distance to the goal there
+#   distance_table.py only expands one board of each mirror pair in its breadth first
+#     search, the table itself stays indexed by rank_board with an entry for every board
+#   pattern_db.py looks up the reflected board too and stores a pattern and its mirror
+#     in one file (see there)
+# the forward searches (search.py) dont: the distance from the initial board (g) of
+#   a board and of its reflection differ unless the initial board is symmetric, and
+#   the closed table rebuilds the path from parent moves that only hold for the board
+#   that was actually reached
+
+# (cell_map, tile_map) of a spec, None if its goal has no diagonal symmetry, cached in spec.tables
+def get_reflection(spec):
+    if 'reflection' in spec.tables:
+        return spec.tables['reflection']
+
+    res = None
+    if spec.rows == spec.cols:
+        cols = spec.cols
+        cell_map = [(index % cols) * cols + index // cols for index in range(spec.size)]
+        if cell_map[spec.goal_index[0]] == spec.goal_index[0]:
+            tile_map = [spec.goal[cell_map[spec.goal_index[tile]]] for tile in range(spec.size)]
+            res = (cell_map, tile_map)
+    spec.tables['reflection'] = res
+    return res
+
+def is_symmetric(spec):
+    return get_reflection(spec) is not None
+
+# reflection of a packed board (see packed.py)
+def reflect_key(key, spec):
+    cell_map, tile_map = get_reflection(spec)
+    puz = unpack(key, spec.size)
+    res = [0] * spec.size
+    for index in range(spec.size):
+        res[cell_map[index]] = tile_map[puz[index]]
+    return pack(res)
+
+# positions (positions[tile] is the index of tile) of the reflection of a board
+def reflect_positions(positions, spec):
+    cell_map, tile_map = get_reflection(spec)
+    res = [0] * spec.size
+    for tile in range(spec.size):
+        res[tile_map[tile]] = cell_map[positions[tile]]
+    return res
+
+# the tiles of a pattern renamed by the reflection (the pattern of the mirror image)
+def reflect_pattern(pattern, spec):
+    tile_map = get_reflection(spec)[1]
+    return [tile_map[tile] for tile in pattern]
@@ -0,0 +1,100 @@
+import os
+import sys
+import random
+import pytest
+
+# the modules of the solver are at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from puzzle_globals import Globals
+from puzzle_spec import get_spec
+from instances import random_solvable_puzzle
+from state import State
+from search import do_search
+from algorithms import ALGORITHMS, get_heuristic
+from distance_table import get_distance_table
+
+# a square board and a board that is not square (the default goals, blank last)
+SPEC_GOALS = {
+    '3x3' : (list(range(1, 9)) + [0], 3),
+    '2x3' : (list(range(1, 6)) + [0], 3),
+}
+
+# the tables built by the tests (distance tables, pattern databases, walking distance)
+#   go to a temporary directory instead of the tables directory of the repository
+@pytest.fixture(autouse = True, scope = 'session')
+def tables_dir(tmp_path_factory):
+    old = Globals.TABLES_DIR
+    Globals.TABLES_DIR = str(tmp_path_factory.mktemp('tables'))
+    yield Globals.TABLES_DIR
+    Globals.TABLES_DIR = old
+
+@pytest.fixture(params = sorted(SPEC_GOALS))
+def spec(request):
+    goal, cols = SPEC_GOALS[request.param]
+    return get_spec(goal, cols)
+
+# random solvable boards of spec, the same ones on every run
+def get_instances(spec, count, seed = 0):
+    rng = random.Random(seed)
+    return [random_solvable_puzzle(spec, rng) for i in range(count)]
+
+# checks that path is a valid solution of instance: it starts at instance, every step
+#   moves one tile next to the blank into the blank and it ends at the goal
+def check_path(path, instance, spec):
+    assert path[0].puz == list(instance)
+    for parent, child in zip(path, path[1:]):
+        parent_puz, child_puz = parent.puz, child.puz
+        blank, child_blank = parent_puz.index(0), child_puz.index(0)
+        assert child_blank in spec.move_table[blank]
+        swapped = list(parent_puz)
+        swapped[blank], swapped[child_blank] = swapped[child_blank], 0
+        assert child_puz == swapped
+    assert path[-1].puz == list(spec.goal)
+
+# (instances, optimal cost of every instance) of each spec, the costs are found once
+#   with a plain breadth first search (ucs)
+_solved_instances = {}
+
+def get_solved_instances(spec, count = 4):
+    if not (spec.size, count) in _solved_instances:
+        instances = get_instances(spec, count)
+        costs = [do_search(State(list(instance), 0, None, spec = spec))['solutions'][-1].cost for instance in instances]
+        _solved_instances[spec.size, count] = instances, costs
+    return _solved_instances[spec.size, count]
+
+# runs the search of an algorithm of ALGORITHMS (in algorithms.py) on instance,
+#   options are added to the options of the algorithm
+def run_algorithm(algorithm, instance, spec, **options):
+    entry = ALGORITHMS[algorithm]
+    init_state = State(list(instance), 0, None, get_heuristic(entry['heuristic'], spec), entry['heuristic_only'], spec = spec)
+    return entry['search'](init_state, **dict(entry.get('options', {}), **options))
+
+# checks the solutions of an algorithm on the goal and on count instances of spec: the
+#   paths are valid, their length is the cost and the cost is optimal (or at least the
+#   optimal cost for the algorithms that arent optimal)
+def check_algorithm(algorithm, spec, count = 4, **options):
+    res = run_algorithm(algorithm, spec.goal, spec, **options)
+    assert res['solutions'][-1].cost == 0
+    assert [state.puz for state in res['path']] == [list(spec.goal)]
+
+    instances, optimal_costs = get_solved_instances(spec)
+    for instance, optimal_cost in list(zip(instances, optimal_costs))[:count]:
+        res = run_algorithm(algorithm, instance, spec, **options)
+        cost = res['solutions'][-1].cost
+        check_path(res['path'], instance, spec)
+        assert len(res['path']) - 1 == cost
+        if ALGORITHMS[algorithm]['optimal']:
+            assert cost == optimal_cost
+        else:
+            assert cost >= optimal_cost
+
+# (board, exact cost) of random boards of spec and of the boards on their optimal
+#   paths, from the distance table of spec (see distance_table.py)
+def get_exact_boards(spec, count = 60):
+    table = get_distance_table(spec)
+    res = []
+    for instance in get_instances(spec, count, seed = 1):
+        for state in table.get_path(State(instance, 0, None, spec = spec)):
+            res.append((state.puz, table.cost(state.key)))
+    return res
@@ -0,0 +1,25 @@
+import pytest
+from conftest import check_algorithm, get_solved_instances, run_algorithm
+from algorithms import solve
+
+@pytest.mark.parametrize('algorithm', ['wa_star_md', 'awa_star_md'])
+def test_weighted_search(spec, algorithm):
+    check_algorithm(algorithm, spec)
+
+# a weighted A* solution costs at most weight times the optimal cost
+def test_weighted_search_is_bounded(spec):
+    for instance, optimal_cost in zip(*get_solved_instances(spec)):
+        for weight in (1.5, 2, 4):
+            assert run_algorithm('wa_star_md', instance, spec, weight = weight)['solutions'][-1].cost <= weight * optimal_cost
+
+def test_anytime_search_proves_optimality(spec):
+    for instance, optimal_cost in zip(*get_solved_instances(spec)):
+        res = run_algorithm('awa_star_md', instance, spec)
+        assert res['optimal']
+        costs = [improvement['cost'] for improvement in res['improvements']]
+        assert costs == sorted(costs, reverse = True) and costs[-1] == optimal_cost
+
+def test_anytime_search_without_time(spec):
+    instances, optimal_costs = get_solved_instances(spec)
+    res = solve(instances[0], 'awa_star_md', spec, options = {'time_limit' : 0})
+    assert res['timed_out']
@@ -0,0 +1,28 @@
+import os
+import pytest
+from atomic_file import atomic_open
+
+def test_atomic_open(tmp_path):
+    path = str(tmp_path / 'tables' / 'table.bin')
+    with atomic_open(path) as f:
+        f.write(b'first')
+        # the file only appears once the block is done
+        assert not os.path.exists(path)
+    with atomic_open(path) as f:
+        f.write(b'second')
+    with open(path, 'rb') as f:
+        assert f.read() == b'second'
+    assert os.listdir(os.path.dirname(path)) == ['table.bin']
+
+# a write that fails leaves the file as it was and no temp file behind
+def test_failed_write(tmp_path):
+    path = str(tmp_path / 'schema.json')
+    with atomic_open(path, 'w') as f:
+        f.write('{}')
+    with pytest.raises(ValueError):
+        with atomic_open(path, 'w') as f:
+            f.write('{"half')
+            raise ValueError()
+    with open(path) as f:
+        assert f.read() == '{}'
+    assert os.listdir(str(tmp_path)) == ['schema.json']
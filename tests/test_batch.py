@@ -0,0 +1,16 @@
+from conftest import get_solved_instances
+from algorithms import solve
+from batch import solve_batch
+
+def test_solve_returns_the_moves(spec):
+    instances, costs = get_solved_instances(spec)
+    res = solve(instances[0], 'a_star_md', spec)
+    assert res['cost'] == costs[0] == len(res['moves'])
+
+# the results of the workers are in the order of the jobs
+def test_solve_batch_with_workers(spec):
+    instances, costs = get_solved_instances(spec)
+    jobs = [(instance, algorithm) for instance in instances for algorithm in ('a_star_md', 'ucs')]
+    results = solve_batch(jobs, workers = 2, chunksize = 1, progress = False, spec = spec)
+    assert [res['cost'] for res in results] == [cost for cost in costs for algorithm in ('a_star_md', 'ucs')]
+    assert [res['moves'] for res in results] == [res['moves'] for res in solve_batch(jobs, workers = 1, progress = False, spec = spec)]
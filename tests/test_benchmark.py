@@ -0,0 +1,37 @@
+from benchmark import compare
+
+def get_row(per_instance):
+    solved = [result for result in per_instance if result]
+    return {
+        'set' : '8puzzle-depth', 'algorithm' : 'a_star_md', 'nodes_per_sec' : 1000,
+        'instances' : len(per_instance), 'solved' : len(solved), 'timeouts' : len(per_instance) - len(solved),
+        'total_cost' : sum(result['cost'] for result in solved),
+        'states_evaluated' : sum(result['states_evaluated'] for result in solved),
+        'max_frontier_size' : max(result['max_frontier_size'] for result in solved),
+        'per_instance' : per_instance,
+    }
+
+def get_result(cost, states_evaluated, max_frontier_size):
+    return {'cost' : cost, 'states_evaluated' : states_evaluated, 'max_frontier_size' : max_frontier_size}
+
+def test_fewer_timeouts_is_not_a_regression():
+    baseline = get_row([get_result(10, 100, 5), None])
+    row = get_row([get_result(10, 100, 5), get_result(30, 9000, 50)])
+    assert compare([row], [baseline]) == []
+
+def test_more_timeouts_is_a_regression():
+    baseline = get_row([get_result(10, 100, 5), get_result(30, 9000, 50)])
+    row = get_row([get_result(10, 100, 5), None])
+    assert compare([row], [baseline]) == ['8puzzle-depth a_star_md: timeouts 1, baseline 0']
+
+def test_more_states_on_the_instances_solved_in_both_runs():
+    baseline = get_row([get_result(10, 100, 5), None])
+    row = get_row([get_result(10, 120, 5), get_result(30, 9000, 50)])
+    assert compare([row], [baseline]) == ['8puzzle-depth a_star_md: states_evaluated 120, baseline 100']
+
+def test_baseline_without_per_instance_results_uses_means():
+    baseline = get_row([get_result(10, 100, 5), get_result(20, 300, 9)])
+    del baseline['per_instance']
+    row = get_row([get_result(10, 100, 5), get_result(20, 300, 9), None])
+    assert compare([row], [baseline])[0] == '8puzzle-depth a_star_md: timeouts 1, baseline 0'
+    assert len(compare([row], [baseline])) == 1
@@ -0,0 +1,17 @@
+import pytest
+from conftest import check_algorithm, get_instances, run_algorithm
+from state import State
+from distance_table import get_distance_table
+
+@pytest.mark.parametrize('algorithm', ['bidirectional_ucs', 'mm_md'])
+def test_bidirectional_search(spec, algorithm):
+    check_algorithm(algorithm, spec)
+
+# the backward heuristic must not count the blank: with a relabeled board the blank
+#   is renamed to a tile when the blank positions of the instance and the goal differ,
+#   which overestimates and misses the optimal cost on some boards
+def test_mm_is_optimal(spec):
+    table = get_distance_table(spec)
+    for instance in get_instances(spec, 200, seed = 2):
+        res = run_algorithm('mm_md', instance, spec)
+        assert res['solutions'][-1].cost == table.cost(State(instance, 0, None, spec = spec).key)
@@ -0,0 +1,31 @@
+from conftest import check_algorithm, get_instances
+from state import State
+from distance_table import get_distance_table, get_table_size, rank_board
+from external_bfs import do_external_search
+
+def test_table_search(spec):
+    check_algorithm('distance_table', spec)
+
+# every board has the cost given by a breadth first search over the whole state space
+def test_distance_table_matches_breadth_first_search(spec):
+    table = get_distance_table(spec)
+    layer_sizes = do_external_search(State(list(spec.goal), 0, None, spec = spec), find_goal = False)['layer_sizes']
+    counts = [0] * len(layer_sizes)
+    for index in range(get_table_size(spec.size)):
+        counts[table.data[table.offset + index]] += 1
+    assert counts == layer_sizes
+
+def test_distance_table_paths(spec):
+    table = get_distance_table(spec)
+    for instance in get_instances(spec, 20):
+        init_state = State(instance, 0, None, spec = spec)
+        path = table.get_path(init_state)
+        assert len(path) - 1 == table.cost(init_state.key)
+        assert path[-1].puz == list(spec.goal)
+
+def test_rank_board_is_a_bijection(spec):
+    ranks = set()
+    for instance in get_instances(spec, 200):
+        ranks.add((rank_board(State(instance, 0, None, spec = spec).key, spec), tuple(instance)))
+    assert len(set(rank for rank, instance in ranks)) == len(ranks)
+    assert all(0 <= rank < get_table_size(spec.size) for rank, instance in ranks)
@@ -0,0 +1,23 @@
+from math import factorial
+from conftest import check_algorithm, get_solved_instances, run_algorithm
+from state import State
+from puzzle_spec import get_spec
+from external_bfs import do_external_search
+
+def test_external_search(spec):
+    check_algorithm('external_bfs', spec)
+
+# with a few records in memory every layer is split into many sorted runs, the merge
+#   gives the same layers and costs
+def test_external_search_with_small_runs(spec, tmp_path):
+    instances, optimal_costs = get_solved_instances(spec)
+    res = run_algorithm('external_bfs', instances[0], spec, directory = str(tmp_path / 'layers'), memory_records = 1000)
+    assert res['solutions'][-1].cost == optimal_costs[0] == len(res['path']) - 1
+    assert res['layer_sizes'] == run_algorithm('external_bfs', instances[0], spec)['layer_sizes']
+
+# half of the permutations of the tiles can be reached from the goal
+def test_enumerate_every_board():
+    spec = get_spec(list(range(1, 6)) + [0], 3)
+    res = do_external_search(State(list(spec.goal), 0, None, spec = spec), memory_records = 16, find_goal = False)
+    assert sum(res['layer_sizes']) == factorial(spec.size) // 2
+    assert res['layer_sizes'][:3] == [1, 2, 3]
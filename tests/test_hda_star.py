@@ -0,0 +1,13 @@
+import pytest
+from conftest import check_algorithm, get_solved_instances, run_algorithm
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_hda_star(spec, workers):
+    check_algorithm('hda_star_md', spec, count = 2, workers = workers)
+
+# the totals of the result are the sums over the workers
+def test_worker_stats(spec):
+    instances, optimal_costs = get_solved_instances(spec)
+    res = run_algorithm('hda_star_md', instances[0], spec, workers = 2)
+    assert len(res['workers']) == 2
+    assert res['states_evaluated'] == sum(worker['states_evaluated'] for worker in res['workers'])
@@ -0,0 +1,18 @@
+import pytest
+from conftest import get_exact_boards
+from state import State
+from heuristics import h_misplaced_tiles, h_manhattan_distance, h_linear_conflict, h_walking_distance
+
+HEURISTICS = [h_misplaced_tiles, h_manhattan_distance, h_linear_conflict, h_walking_distance]
+
+@pytest.mark.parametrize('heuristic_function', HEURISTICS, ids = lambda h: h.__name__)
+def test_heuristic_is_admissible(spec, heuristic_function):
+    for puz, cost in get_exact_boards(spec):
+        assert heuristic_function(State(puz, 0, None, spec = spec)) <= cost
+    assert heuristic_function(State(list(spec.goal), 0, None, spec = spec)) == 0
+
+# linear conflict only adds moves to the manhattan distance
+def test_linear_conflict_dominates_manhattan_distance(spec):
+    for puz, cost in get_exact_boards(spec):
+        state = State(puz, 0, None, spec = spec)
+        assert h_manhattan_distance(state) <= h_linear_conflict(state)
@@ -0,0 +1,13 @@
+from conftest import check_algorithm, get_solved_instances
+from state import State, order_by_heuristic
+from ida_star import do_ida_search
+from heuristics import h_manhattan_distance
+
+def test_ida_star(spec):
+    check_algorithm('ida_star_md', spec)
+
+# ordering the moves by their heuristic delta doesnt change the cost
+def test_move_order(spec):
+    for instance, cost in zip(*get_solved_instances(spec)):
+        res = do_ida_search(State(instance, 0, None, h_manhattan_distance, spec = spec), order = order_by_heuristic)
+        assert res['solutions'][-1].cost == cost == len(res['path']) - 1
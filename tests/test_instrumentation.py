@@ -0,0 +1,39 @@
+import pytest
+from conftest import get_instances
+from state import State
+from search import do_search
+from heuristics import h_manhattan_distance, h_misplaced_tiles, h_linear_conflict
+from instrumentation import SearchStats
+
+# do_instrumented_search is a copy of the loop of do_search with the measurements added,
+#   an instrumented search has to make exactly the same choices as the plain one
+@pytest.mark.parametrize('heuristic_function, heuristic_only, weight', [
+    (h_manhattan_distance, False, 1),
+    (h_misplaced_tiles, False, 1),
+    (h_linear_conflict, False, 1),
+    (h_manhattan_distance, False, 2),
+    (h_manhattan_distance, True, 1),
+    (None, False, 1),
+])
+def test_instrumented_search_matches_do_search(spec, heuristic_function, heuristic_only, weight):
+    for instance in get_instances(spec, 5 if heuristic_function else 2):
+        plain = do_search(State(instance, 0, None, heuristic_function, heuristic_only, spec = spec), weight = weight)
+        stats = SearchStats()
+        instrumented = do_search(State(instance, 0, None, heuristic_function, heuristic_only, spec = spec), stats = stats, weight = weight)
+
+        for name in ('states_evaluated', 'max_frontier_size', 'states_evaluated_per_layer'):
+            assert instrumented[name] == plain[name]
+        assert [state.puz for state in instrumented['path']] == [state.puz for state in plain['path']]
+        assert instrumented['solutions'][-1].cost == plain['solutions'][-1].cost
+
+        counters = instrumented['stats']['counters']
+        assert counters['pops'] == plain['states_evaluated']
+        assert counters['expanded'] == plain['states_evaluated'] - 1
+        assert counters['generated'] == counters['pushes'] - 1 + counters['duplicates']
+
+def test_instrumented_search_without_timers(spec):
+    instance = get_instances(spec, 1)[0]
+    plain = do_search(State(instance, 0, None, h_manhattan_distance, spec = spec))
+    instrumented = do_search(State(instance, 0, None, h_manhattan_distance, spec = spec), stats = SearchStats(timers = False))
+    assert instrumented['states_evaluated'] == plain['states_evaluated']
+    assert instrumented['stats']['counters']['pops'] == plain['states_evaluated']
@@ -0,0 +1,60 @@
+import os
+import pytest
+from conftest import check_algorithm, get_exact_boards
+from state import State
+from ranking import rank_positions
+from puzzle_spec import get_spec
+from pattern_db import PatternDatabaseHeuristic, PARTITIONS, DEFAULT_PARTITIONS, build_pattern_db, build_pattern_dbs, get_pattern_db_path, get_stored_pattern
+
+# partitions of the tiles of the test specs
+TEST_PARTITIONS = {
+    9 : [PARTITIONS['4-4'], PARTITIONS['3-3-2-mirror']],
+    6 : [[[1,2,3],[4,5]], [[1,4],[2,5],[3]]],
+}
+
+def get_8_puzzle_spec():
+    return get_spec(list(range(1, 9)) + [0])
+
+# with reflect the heuristic is the largest of the lookups of the board and of its
+#   reflection, which stays admissible
+@pytest.mark.parametrize('reflect', [True, False])
+def test_pattern_database_is_admissible(spec, tmp_path, reflect):
+    for partition in TEST_PARTITIONS[spec.size]:
+        heuristic_function = PatternDatabaseHeuristic(partition, spec, str(tmp_path), reflect = reflect)
+        for puz, cost in get_exact_boards(spec):
+            assert heuristic_function(State(puz, 0, None, spec = spec)) <= cost
+        assert heuristic_function(State(list(spec.goal), 0, None, spec = spec)) == 0
+
+# a single pattern of all the tiles is exact
+def test_pattern_database_of_all_the_tiles(tmp_path):
+    spec = get_8_puzzle_spec()
+    heuristic_function = PatternDatabaseHeuristic([list(range(1, 9))], spec, str(tmp_path))
+    for puz, cost in get_exact_boards(spec, 10):
+        assert heuristic_function(State(puz, 0, None, spec = spec)) == cost
+
+def test_a_star_pdb():
+    check_algorithm('a_star_pdb', get_8_puzzle_spec())
+
+# without build the databases have to be built first (worker processes)
+def test_build_step(tmp_path):
+    spec = get_8_puzzle_spec()
+    partition = PARTITIONS[DEFAULT_PARTITIONS[spec.size]]
+    with pytest.raises(FileNotFoundError):
+        PatternDatabaseHeuristic(partition, spec, str(tmp_path), build = False)
+    paths = build_pattern_dbs(partition, spec, str(tmp_path))
+    assert paths == [get_pattern_db_path(get_stored_pattern(pattern, spec)[0], spec, str(tmp_path)) for pattern in partition]
+    assert all(os.path.exists(path) for path in paths)
+    assert build_pattern_dbs(partition, spec, str(tmp_path)) == []
+    PatternDatabaseHeuristic(partition, spec, str(tmp_path), build = False)
+
+# a mirror pattern looked up through the database of its mirror gives the values of
+#   its own database
+def test_mirrored_pattern_database(tmp_path):
+    spec = get_8_puzzle_spec()
+    pattern = [4, 7, 8]
+    assert get_stored_pattern(pattern, spec) == ([2, 3, 6], True)
+    direct = build_pattern_db(pattern, spec)
+    heuristic_function = PatternDatabaseHeuristic([pattern], spec, str(tmp_path), reflect = False)
+    for puz, cost in get_exact_boards(spec, 10):
+        positions = [puz.index(tile) for tile in range(spec.size)]
+        assert heuristic_function(State(puz, 0, None, spec = spec)) == direct[rank_positions([positions[tile] for tile in pattern], spec.size)]
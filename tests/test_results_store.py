@@ -0,0 +1,106 @@
+import os
+import pytest
+from conftest import get_solved_instances
+from algorithms import solve
+from solution_cache import SolutionCache
+from results_store import ResultStore, get_complexity_curves, get_instance_key, SOLVED, TIMED_OUT, NODE_LIMIT
+
+def get_result(cost, states_evaluated, time = 0.5):
+    return {'cost' : cost, 'moves' : 'u' * cost, 'max_frontier_size' : states_evaluated * 2, 'states_evaluated' : states_evaluated, 'time' : time}
+
+# rows of two algorithms, a timeout and a node limit
+def fill_store(store, spec):
+    instances, costs = get_solved_instances(spec)
+    jobs = [(instance, 'a_star_md') for instance in instances] + [(instances[0], 'ucs'), (instances[1], 'ucs'), (instances[2], 'ucs')]
+    results = [get_result(cost, 10 * (index + 1)) for index, cost in enumerate(costs)] + \
+              [get_result(costs[0], 1000), {'timed_out' : True}, {'node_limit' : True, 'states_evaluated' : 50}]
+    store.append(spec, jobs, results)
+    return jobs, results
+
+def test_append(spec, tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    jobs, results = fill_store(store, spec)
+    assert len(store) == len(jobs)
+    # the rows of an earlier run are kept when the store is opened again
+    store = ResultStore(str(tmp_path / 'store'))
+    fill_store(store, spec)
+    assert len(store) == 2 * len(jobs)
+    assert store.schema['algorithms'] == ['a_star_md', 'ucs']
+
+    rows = {}
+    for chunk in store.iter_chunks(['instance', 'algorithm', 'status', 'cost', 'states_evaluated'], chunk_rows = 3):
+        for name, values in chunk.items():
+            rows.setdefault(name, []).extend(values)
+    assert rows['instance'][:len(jobs)] == [get_instance_key(instance) for instance, algorithm in jobs]
+    assert rows['algorithm'][:len(jobs)] == [0, 0, 0, 0, 1, 1, 1]
+    assert rows['status'][len(jobs) - 3:len(jobs)] == [SOLVED, TIMED_OUT, NODE_LIMIT]
+    assert rows['cost'][len(jobs) - 3:len(jobs)] == [results[-3]['cost'], -1, -1]
+    assert rows['states_evaluated'][len(jobs) - 1] == 50
+
+# an append interrupted after some of the column files leaves them longer than the
+#   others, they are cut back to the complete rows when the store is opened
+def test_truncate_after_a_torn_append(spec, tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    jobs, results = fill_store(store, spec)
+    with open(store.get_column_path('timestamp'), 'ab') as f:
+        f.write(b'\0' * 8 * 3)
+    with open(store.get_column_path('cost'), 'ab') as f:
+        f.write(b'\1\2')
+    store = ResultStore(str(tmp_path / 'store'))
+    assert len(store) == len(jobs)
+    for name, itemsize in store.itemsizes.items():
+        assert os.path.getsize(store.get_column_path(name)) == len(jobs) * itemsize
+    fill_store(store, spec)
+    assert len(store) == 2 * len(jobs)
+    assert store.aggregate(['algorithm'], ['cost'])['ucs',]['count'] == 2
+
+def test_aggregate(spec, tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    jobs, results = fill_store(store, spec)
+    groups = store.aggregate(['algorithm'], ['states_evaluated', 'cost'])
+    # only the solved rows are aggregated
+    assert sorted(groups) == [('a_star_md',), ('ucs',)]
+    assert groups['ucs',]['count'] == 1
+    states = groups['a_star_md',]['states_evaluated']
+    assert (states['sum'], states['min'], states['max'], states['mean']) == (100, 10, 40, 25)
+    costs = [result['cost'] for result in results[:4]]
+    assert groups['a_star_md',]['cost']['mean'] == sum(costs) / 4
+    groups = store.aggregate(['algorithm'], ['cost'], where = lambda row: row['states_evaluated'] > 20)
+    assert groups['a_star_md',]['count'] == 2
+    assert store.aggregate(['algorithm'], ['cost'], where = lambda row: row['rows'] != spec.rows) == {}
+
+def test_memmap(spec, tmp_path):
+    np = pytest.importorskip('numpy')
+    store = ResultStore(str(tmp_path / 'store'))
+    assert len(store.memmap(['cost'])['cost']) == 0
+    jobs, results = fill_store(store, spec)
+    columns = store.memmap(['cost', 'status', 'time'])
+    assert sorted(columns) == ['cost', 'status', 'time']
+    assert list(columns['cost']) == [result['cost'] for result in results[:5]] + [-1, -1]
+    assert columns['cost'].dtype == np.dtype('<i4')
+    assert int((columns['status'] == SOLVED).sum()) == 5
+
+def test_complexity_curves(spec, tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    jobs, results = fill_store(store, spec)
+    curves = get_complexity_curves(store, spec.rows, spec.cols)
+    assert sorted(curves) == ['a_star_md', 'ucs']
+    curve = curves['a_star_md']
+    assert curve['cost'] == sorted(set(result['cost'] for result in results[:4]))
+    assert sum(curve['count']) == 4
+    assert curves['ucs']['states_evaluated'] == [1000]
+    assert get_complexity_curves(store, spec.rows + 1, spec.cols) == {}
+
+# the results answered from a solution cache are the ones of an earlier run
+def test_cached_results_arent_stored(spec, tmp_path):
+    store = ResultStore(str(tmp_path / 'store'))
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        instances, costs = get_solved_instances(spec)
+        jobs = [(instances[0], 'a_star_md')] * 2
+        results = [solve(instance, algorithm, spec, cache) for instance, algorithm in jobs]
+        assert results[1]['cached']
+        store.append(spec, jobs, results)
+        assert len(store) == 1
+    finally:
+        cache.close()
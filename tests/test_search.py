@@ -0,0 +1,17 @@
+import pytest
+from conftest import check_algorithm
+from search import closed_entry, closed_cost, closed_parent_blank
+
+# the algorithms that search with do_search (the other searches have their own tests)
+@pytest.mark.parametrize('algorithm', ['ucs', 'greedy_mt', 'greedy_md', 'a_star_mt', 'a_star_md', 'a_star_lc', 'a_star_wd'])
+def test_search(spec, algorithm):
+    check_algorithm(algorithm, spec)
+
+# a closed entry gives back its cost and the blank of the parent (-1 for the initial board)
+def test_closed_entry():
+    stride = 17
+    for cost in (0, 1, 80, 1 << 40):
+        assert closed_parent_blank(closed_entry(cost, None, stride), stride) == -1
+        for parent_blank in range(stride - 1):
+            entry = closed_entry(cost, parent_blank, stride)
+            assert (closed_cost(entry, stride), closed_parent_blank(entry, stride)) == (cost, parent_blank)
@@ -0,0 +1,113 @@
+import os
+import json
+import asyncio
+import pytest
+from server import SolveServer
+from stream import get_board_spec
+from pattern_db import PARTITIONS, DEFAULT_PARTITIONS, get_pattern_db_path, get_stored_pattern
+
+BOARD = [1, 2, 3, 4, 5, 6, 0, 7, 8]
+# a 15 puzzle board that ucs cant solve before the timeout of the workers
+HARD_BOARD = [15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 1, 2, 0]
+
+# sends one http request to the server on the unix socket path
+#   returns (status, response), the connection has to end after the response
+async def request(path, method, url, body = None):
+    reader, writer = await asyncio.open_unix_connection(path)
+    data = json.dumps(body).encode() if body is not None else b''
+    writer.write(('%s %s HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % (method, url, len(data))).encode() + data)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 10)
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+def solve(path, body):
+    return request(path, 'POST', '/solve', body)
+
+# runs test(server, socket path) against a server with the options
+def run_server(tmp_path, test, **options):
+    path = str(tmp_path / 'server.sock')
+    async def main():
+        server = SolveServer(**dict({'workers' : 1, 'timeout' : 2}, **options))
+        await server.start(unix = path)
+        try:
+            await test(server, path)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+def test_solve_and_metrics(tmp_path):
+    async def test(server, path):
+        status, res = await solve(path, {'id' : 'a', 'board' : BOARD})
+        assert status == 200
+        assert res['id'] == 'a' and res['status'] == 'solved' and res['cost'] == 2 and res['moves']
+        status, metrics = await request(path, 'GET', '/metrics')
+        assert status == 200
+        assert metrics['requests'] == 1 and metrics['completed'] == 1
+        assert metrics['queue_depth'] == 0 and metrics['in_flight'] == 0
+        assert 0 < metrics['latency']['p50'] <= metrics['latency']['max']
+    run_server(tmp_path, test)
+
+@pytest.mark.parametrize('body', [
+    None,
+    {'board' : 'x'},
+    {'board' : list(range(10000))},
+    {'board' : BOARD, 'algorithm' : 'nope'},
+    {'board' : BOARD, 'deadline' : 0},
+    {'board' : BOARD, 'deadline' : float('inf')},
+    {'board' : BOARD, 'options' : {'workers' : 2}},
+    {'board' : BOARD, 'options' : {'weight' : float('nan')}},
+    {'board' : BOARD, 'algorithm' : 'awa_star_md', 'options' : {'time_limit' : -1}},
+])
+def test_bad_requests(tmp_path, body):
+    async def test(server, path):
+        status, res = await solve(path, body)
+        assert status == 400 and res['error']
+        assert server.metrics['completed'] == 0
+    run_server(tmp_path, test)
+
+def test_unknown_path(tmp_path):
+    async def test(server, path):
+        assert (await request(path, 'GET', '/nope'))[0] == 404
+    run_server(tmp_path, test)
+
+# the same instance asked twice at once is solved once
+def test_deduplication(tmp_path):
+    async def test(server, path):
+        results = await asyncio.gather(solve(path, {'id' : 1, 'board' : BOARD}), solve(path, {'id' : 2, 'board' : BOARD}))
+        assert [status for status, res in results] == [200, 200]
+        assert [res['id'] for status, res in results] == [1, 2]
+        assert results[0][1]['cost'] == results[1][1]['cost']
+        assert server.metrics['deduplicated'] == 1
+    run_server(tmp_path, test)
+
+def test_deadline_exceeded(tmp_path):
+    async def test(server, path):
+        status, res = await solve(path, {'board' : HARD_BOARD, 'algorithm' : 'ucs', 'deadline' : 0.2})
+        assert status == 504
+        assert server.metrics['deadline_exceeded'] == 1
+    run_server(tmp_path, test)
+
+def test_full_queue(tmp_path):
+    async def test(server, path):
+        first = asyncio.ensure_future(solve(path, {'board' : HARD_BOARD, 'algorithm' : 'ucs'}))
+        while not server.pending:
+            await asyncio.sleep(0.01)
+        status, res = await solve(path, {'board' : BOARD})
+        assert status == 503
+        assert server.metrics['rejected'] == 1
+        # the worker gives up on the first instance after its timeout
+        status, res = await first
+        assert status == 200 and res['status'] == 'timeout'
+    run_server(tmp_path, test, max_queue = 1)
+
+# the pattern databases of an algorithm that isnt warm are built by the server process
+#   before its first batch is sent to the workers
+def test_tables_of_algorithms_that_arent_warm(tmp_path):
+    spec = get_board_spec(BOARD)
+    async def test(server, path):
+        await server.prepare('a_star_pdb', 9)
+        for pattern in PARTITIONS[DEFAULT_PARTITIONS[9]]:
+            assert os.path.exists(get_pattern_db_path(get_stored_pattern(pattern, spec)[0], spec))
+    run_server(tmp_path, test)
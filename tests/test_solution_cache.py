@@ -0,0 +1,93 @@
+import time
+from conftest import get_instances, get_exact_boards
+from state import State
+from packed import unpack
+from heuristics import h_manhattan_distance
+from distance_table import get_distance_table
+from algorithms import ALGORITHMS, get_algorithm_names, solve
+from solution_cache import SolutionCache
+
+# a board solved before is answered from the cache, with the same cost and moves
+def test_cached_solution(spec, tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        instance = get_instances(spec, 1)[0]
+        res = solve(instance, 'a_star_md', spec, cache)
+        assert not res.get('cached')
+        cached = solve(instance, 'a_star_md', spec, cache)
+        assert cached['cached'] and (cached['cost'], cached['moves']) == (res['cost'], res['moves'])
+        assert not solve(instance, 'ucs', spec, cache).get('cached')
+    finally:
+        cache.close()
+
+# every default algorithm runs with the exact costs of the cache as heuristic values
+def test_exact_heuristic_with_every_algorithm(spec, tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        instances = get_instances(spec, 6)
+        optimal_costs = [solve(instance, 'a_star_md', spec, cache)['cost'] for instance in instances]
+        # the first boards are in the cache, the last ones are new to it
+        others = get_instances(spec, 3, seed = 1)
+        optimal_costs += [solve(instance, 'ucs', spec)['cost'] for instance in others]
+        for algorithm in get_algorithm_names(spec):
+            for instance, optimal_cost in zip(instances[:3] + others, optimal_costs[:3] + optimal_costs[6:]):
+                res = solve(instance, algorithm, spec, cache, exact_heuristic = True)
+                if ALGORITHMS[algorithm]['optimal']:
+                    assert res['cost'] == optimal_cost, algorithm
+                else:
+                    assert res['cost'] >= optimal_cost, algorithm
+    finally:
+        cache.close()
+
+# the exact costs stored for the boards on the optimal paths are the costs of the
+#   distance table, and the heuristic stays admissible on every other board
+def test_exact_distance_heuristic(spec, tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        for instance in get_instances(spec, 5):
+            solve(instance, 'a_star_md', spec, cache)
+        heuristic_function = cache.heuristic(h_manhattan_distance, spec)
+        assert heuristic_function.distances
+        for puz, cost in get_exact_boards(spec):
+            assert heuristic_function(State(puz, 0, None, spec = spec)) <= cost
+        table = get_distance_table(spec)
+        for key, cost in heuristic_function.distances.items():
+            assert cost == table.cost(key)
+            assert heuristic_function(State(unpack(key, spec.size), 0, None, spec = spec)) == cost
+    finally:
+        cache.close()
+
+def count_rows(cache, table):
+    return cache.connection.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+
+# the limits hold after every put, however few puts there are
+def test_cache_is_bounded(spec, tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'), max_entries = 5, max_distances = 20)
+    try:
+        for instance in get_instances(spec, 30, seed = 3):
+            solve(instance, 'a_star_md', spec, cache)
+            assert count_rows(cache, 'solutions') <= 5
+            assert count_rows(cache, 'distances') <= 20
+        assert len(cache.get_distances(spec)) == count_rows(cache, 'distances')
+    finally:
+        cache.close()
+
+# the exact costs used as heuristic values are kept over the ones that werent used
+def test_used_distances_are_kept(spec, tmp_path):
+    cache = SolutionCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        instances = get_instances(spec, 6, seed = 4)
+        for instance in instances:
+            solve(instance, 'a_star_md', spec, cache)
+        # another algorithm searches the first board again with the exact costs stored
+        start = time.time()
+        solve(instances[0], 'a_star_mt', spec, cache, exact_heuristic = True)
+        used = set(int(board) for board, in cache.connection.execute('SELECT board FROM distances WHERE last_used >= ?', (start,)))
+        assert State(instances[0], 0, None, spec = spec).key in used
+        assert used < set(cache.get_distances(spec))
+        cache.max_distances = len(used)
+        cache.inserted['distances'] = len(used)
+        cache.evict()
+        assert set(cache.get_distances(spec)) == used
+    finally:
+        cache.close()
@@ -0,0 +1,31 @@
+import pytest
+from conftest import get_instances
+from state import State, order_by_heuristic
+from heuristics import h_misplaced_tiles, h_manhattan_distance
+
+# the heuristic values of the children given by the delta functions match a full computation
+@pytest.mark.parametrize('heuristic_function', [h_misplaced_tiles, h_manhattan_distance], ids = lambda h: h.__name__)
+def test_heuristic_delta(spec, heuristic_function):
+    for instance in get_instances(spec, 20):
+        state = State(instance, 0, None, heuristic_function, spec = spec)
+        for child in state.expand():
+            assert child.heuristic == heuristic_function(State(child.puz, 0, None, spec = spec))
+
+# successors gives the same moves in both orders, and the deltas in increasing order
+def test_successors(spec):
+    for instance in get_instances(spec, 20):
+        state = State(instance, 0, None, h_manhattan_distance, spec = spec)
+        pairs = list(state.successors())
+        ordered = list(state.successors(order_by_heuristic))
+        assert sorted(pairs) == sorted(ordered)
+        assert [delta for tile_index, delta in ordered] == sorted(delta for tile_index, delta in pairs)
+        assert sorted(tile_index for tile_index, delta in pairs) == sorted(spec.move_table[state.blank])
+
+# one entry per neighbour of the blank and one for a state without a parent
+def test_successor_table(spec):
+    for blank in range(spec.size):
+        moves = spec.successors[blank]
+        assert set(moves) == set(spec.move_table[blank]) | {None}
+        assert moves[None] == tuple(spec.move_table[blank])
+        for parent_blank in spec.move_table[blank]:
+            assert moves[parent_blank] == tuple(tile for tile in spec.move_table[blank] if tile != parent_blank)
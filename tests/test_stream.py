@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import time
+import signal
+import subprocess
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# a 15 puzzle board that ucs cant solve in the time of the test
+HARD_BOARD = [15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 1, 2, 0]
+
+def start_stream(tmp_path, lines, *args):
+    path = tmp_path / 'instances.jsonl'
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+    return subprocess.Popen([sys.executable, os.path.join(ROOT, 'stream.py'), str(path)] + list(args),
+                            stdout = subprocess.PIPE, stderr = subprocess.PIPE, text = True, cwd = ROOT)
+
+# SIGTERM in the middle of a search stops the stream, with one worker and with a pool
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sigterm_stops_the_stream(tmp_path, workers):
+    process = start_stream(tmp_path, [HARD_BOARD] * 3, '--algorithm', 'ucs', '--workers', str(workers))
+    try:
+        time.sleep(2)
+        assert process.poll() is None
+        process.send_signal(signal.SIGTERM)
+        out, err = process.communicate(timeout = 10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.communicate()
+    assert process.returncode == 130
+    assert out == ''
+    assert json.loads(err.splitlines()[-1]) == {'cancelled' : True}
+
+# the pattern databases are built by the main process before the jobs reach the workers
+def test_pattern_databases_with_workers(tmp_path):
+    lines = [{'board' : [1, 2, 3, 4, 5, 6, 0, 7, 8], 'algorithm' : 'a_star_pdb'}, {'board' : [8, 6, 7, 2, 5, 4, 3, 0, 1], 'algorithm' : 'a_star_pdb'}]
+    path = tmp_path / 'instances.jsonl'
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines))
+    # the forked workers see the tables directory of the main process
+    code = ('import sys\nfrom puzzle_globals import Globals\nGlobals.TABLES_DIR = %r\nimport stream\n'
+            'sys.argv = ["stream.py", %r, "--workers", "2"]\nstream.main()' % (str(tmp_path / 'tables'), str(path)))
+    out = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, cwd = ROOT, timeout = 60).stdout
+    results = sorted((json.loads(line) for line in out.splitlines()), key = lambda res: res['id'])
+    assert [(res['status'], res.get('cost')) for res in results] == [('solved', 2), ('solved', 31)]
@@ -0,0 +1,23 @@
+import pytest
+from conftest import check_algorithm, get_exact_boards, get_solved_instances, run_algorithm
+from state import State
+from heuristics import h_manhattan_distance, h_misplaced_tiles
+
+vectorized = pytest.importorskip('vectorized')
+np = pytest.importorskip('numpy')
+
+# the batch heuristics give the values of the heuristics in heuristics.py
+def test_batch_heuristics(spec):
+    puzzles = [puz for puz, cost in get_exact_boards(spec, 10)]
+    boards = np.array(puzzles)
+    for heuristic_function, batch in ((h_manhattan_distance, vectorized.h_manhattan_distance_batch), (h_misplaced_tiles, vectorized.h_misplaced_tiles_batch)):
+        assert list(batch(boards, spec)) == [heuristic_function(State(puz, 0, None, spec = spec)) for puz in puzzles]
+
+# larger batches arent always optimal, with batch_size 1 the batch search is a plain A*
+@pytest.mark.parametrize('batch_size', [1, 64])
+def test_batch_search(spec, batch_size):
+    check_algorithm('batch_a_star_md', spec, batch_size = batch_size)
+
+def test_batch_search_of_one_node_is_optimal(spec):
+    for instance, cost in zip(*get_solved_instances(spec)):
+        assert run_algorithm('batch_a_star_md', instance, spec, batch_size = 1)['solutions'][-1].cost == cost
@@ -0,0 +1,150 @@
+import heapq
+import numpy as np
+from packed import pack, tile_bits
+from search import closed_entry, closed_cost, get_closed_path
+from heuristics import h_manhattan_distance, h_misplaced_tiles
+from puzzle_spec import get_default_spec
+
+# vectorized heuristics and a batch search for the n puzzle (needs numpy)
+#
+# the batch heuristics score a 2-d array of boards (one board per row, N x tiles)
+#   in a single call using goal row and goal column tables built once per spec
+# do_batch_search pops batch_size nodes at a time, builds all their children in one
+#   array and scores them with a single call of the batch heuristic
+
+# goal tables of a spec as arrays, cached in spec.tables
+#   goal_row[tile], goal_col[tile] are the row and col of tile in the goal
+#   cell_row[index], cell_col[index] are the row and col of a cell of the board
+def get_goal_arrays(spec):
+    if 'arrays' in spec.tables:
+        return spec.tables['arrays']
+
+    cells = np.arange(spec.size)
+    res = {
+        'goal' : np.array(spec.goal, dtype = np.uint8),
+        'goal_row' : np.array(spec.goal_row),
+        'goal_col' : np.array(spec.goal_col),
+        'cell_row' : cells // spec.cols,
+        'cell_col' : cells % spec.cols,
+    }
+    spec.tables['arrays'] = res
+    return res
+
+# manhattan distance of every board (row) of boards to the goal of spec
+#   (default: the spec of the goal in puzzle_globals.py)
+def h_manhattan_distance_batch(boards, spec = None):
+    tables = get_goal_arrays(spec or get_default_spec())
+    distance = np.abs(tables['goal_row'][boards] - tables['cell_row']) + \
+               np.abs(tables['goal_col'][boards] - tables['cell_col'])
+    distance[boards == 0] = 0
+    return distance.sum(axis = 1)
+
+# number of misplaced tiles of every board (row) of boards
+def h_misplaced_tiles_batch(boards, spec = None):
+    tables = get_goal_arrays(spec or get_default_spec())
+    return ((boards != tables['goal']) & (boards != 0)).sum(axis = 1)
+
+# batch version of each heuristic in heuristics.py
+BATCH_HEURISTICS = {
+    h_manhattan_distance : h_manhattan_distance_batch,
+    h_misplaced_tiles : h_misplaced_tiles_batch,
+}
+
+# packs every board (row) of boards like packed.pack
+#   boards that fit in 64 bits are packed in one vectorized call
+def pack_batch(boards):
+    size = boards.shape[1]
+    bits = tile_bits(size)
+    if size * bits <= 64:
+        shifts = np.arange(size, dtype = np.uint64) * np.uint64(bits)
+        keys = (boards.astype(np.uint64) << shifts).sum(axis = 1, dtype = np.uint64)
+        return [int(key) for key in keys]
+    return [pack(row.tolist()) for row in boards]
+
+# batch best first search from an initial state
+#   batch_size nodes with the smallest f = g + weight * h (f = h for greedy, heuristic_only)
+#   are popped and expanded together, with batch_size > 1 or weight > 1 the solution
+#   is not always optimal
+# the heuristic function of init_state must have a batch version in BATCH_HEURISTICS
+# returns the same dictionary as do_search in search.py
+#   {solution : [solution states], path : [states], max_frontier_size : int, states_eval : int}
+def do_batch_search(init_state, batch_size = 64, weight = 1.0):
+    res = {
+        'solutions' : [],
+        'max_frontier_size' : 0,
+        'states_evaluated' : 0,
+    }
+    spec = init_state.spec
+    size = spec.size
+    batch_heuristic = BATCH_HEURISTICS.get(init_state.heuristic_function)
+    if init_state.heuristic_function and not batch_heuristic:
+        raise ValueError('heuristic has no batch version')
+
+    # move table as an array, -1 where there is no tile to move
+    move_table = np.full((size, 4), -1, dtype = np.int64)
+    for blank_index, tiles in enumerate(spec.move_table):
+        move_table[blank_index, :len(tiles)] = tiles
+
+    def priority(g, h):
+        if init_state.heuristic_only:
+            return h
+        return g + weight * h
+
+    goal_key = spec.goal_key
+    stride = size + 1
+    # closed table of do_search (see closed_entry in search.py)
+    duplicates = {init_state.key : closed_entry(0, None, stride)}
+    counter = 0
+    # open list of (f, h, -counter, key, g, blank, parent_blank, board)
+    frontier = [(priority(0, init_state.heuristic), init_state.heuristic, 0, init_state.key, 0, init_state.blank, -1,
+                 np.array(init_state.puz, dtype = np.uint8))]
+
+    while frontier:
+        batch = []
+        while frontier and len(batch) < batch_size:
+            f, h, count, key, g, blank, parent_blank, board = heapq.heappop(frontier)
+            # skips entries that were pushed again with a cheaper cost
+            if closed_cost(duplicates[key], stride) != g: continue
+            res['states_evaluated'] += 1
+            if key == goal_key:
+                res['path'] = get_closed_path(init_state, key, blank, duplicates)
+                res['solutions'].append(res['path'][-1])
+                return res
+            batch.append((g, blank, parent_blank, board))
+        if not batch:
+            break
+
+        # all the children of the batch in one array
+        parents = np.array([node[3] for node in batch])
+        blanks = np.array([node[1] for node in batch])
+        tiles = move_table[blanks]
+        valid = (tiles >= 0) & (tiles != np.array([node[2] for node in batch])[:, None])
+        parent_rows, move_columns = np.nonzero(valid)
+        tile_indices = tiles[parent_rows, move_columns]
+        child_blanks = blanks[parent_rows]
+
+        children = parents[parent_rows]
+        rows = np.arange(len(children))
+        children[rows, child_blanks] = children[rows, tile_indices]
+        children[rows, tile_indices] = 0
+
+        if batch_heuristic:
+            heuristics = batch_heuristic(children, spec).tolist()
+        else:
+            heuristics = [0] * len(children)
+        keys = pack_batch(children)
+
+        for i in range(len(children)):
+            g = batch[parent_rows[i]][0] + 1
+            child_key = keys[i]
+            if child_key in duplicates and closed_cost(duplicates[child_key], stride) <= g:
+                continue
+            parent_blank = int(child_blanks[i])
+            duplicates[child_key] = closed_entry(g, parent_blank, stride)
+            counter += 1
+            h = heuristics[i]
+            heapq.heappush(frontier, (priority(g, h), h, -counter, child_key, g, int(tile_indices[i]), parent_blank, children[i]))
+
+        res['max_frontier_size'] = max(res['max_frontier_size'], len(frontier))
+    return res
+